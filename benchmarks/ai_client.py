@@ -0,0 +1,101 @@
+"""
+Latency of Gemini calls against benchmarks/gemini_stub.py, two ways:
+
+  per-call  a new aiohttp.ClientSession per request, reading the body with
+            text() and then json() (the original call_gemini_api)
+  pooled    utils.gemini.GeminiClient: one session, keep-alive connections
+
+Requests run --concurrency at a time. The stub runs over plain HTTP on
+loopback, so this only shows the TCP connect and session setup saved; with
+TLS to the real API each new connection also costs a handshake round trip.
+
+Usage: python benchmarks/ai_client.py [--requests 500] [--concurrency 4] [--delay 0]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import aiohttp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import gemini_stub  # noqa: E402
+from utils.gemini import GEMINI_MODEL, GeminiClient, build_payload, response_text  # noqa: E402
+
+PROMPT = "You are an AI assistant.\n\nUser request:\nHow do I debounce a touch event in Luau?"
+
+
+async def per_call(base_url: str) -> str:
+    url = f"{base_url}/models/{GEMINI_MODEL}:generateContent"
+    async with aiohttp.ClientSession() as session:
+        async with session.post(url, json=build_payload(PROMPT), headers={"x-goog-api-key": "bench"}) as resp:
+            text = await resp.text()
+            if resp.status != 200:
+                raise RuntimeError(f"API error {resp.status}: {text}")
+            data = await resp.json()
+    return response_text(data)
+
+
+async def measure(call, n_requests: int, concurrency: int):
+    latencies = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(n_requests)))
+    return latencies, time.perf_counter() - start
+
+
+def report(name: str, latencies, elapsed: float, connections: int) -> None:
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))] * 1000
+    print(
+        f"  {name:9} p50 {p50:7.2f} ms  p99 {p99:7.2f} ms  "
+        f"{len(latencies) / elapsed:8.0f} req/s  {connections:4d} connections"
+    )
+
+
+async def run(n_requests: int, concurrency: int, delay: float) -> None:
+    app = gemini_stub.make_app(delay)
+    runner = await gemini_stub.start(app)
+    host, port = runner.addresses[0][:2]
+    base_url = f"http://{host}:{port}/v1beta"
+    print(f"{n_requests} requests, concurrency {concurrency}, stub delay {delay * 1000:.0f} ms")
+
+    latencies, elapsed = await measure(lambda: per_call(base_url), n_requests, concurrency)
+    report("per-call", latencies, elapsed, len(app["peers"]))
+
+    app["peers"].clear()
+    client = GeminiClient("bench", base_url=base_url)
+    await client.start()
+    try:
+        latencies, elapsed = await measure(lambda: client.generate(PROMPT), n_requests, concurrency)
+    finally:
+        await client.close()
+    report("pooled", latencies, elapsed, len(app["peers"]))
+
+    await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--delay", type=float, default=0.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency, args.delay))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Local stand-in for the Gemini API, for benchmarks and offline testing.
+
+Answers generateContent with a canned candidate after --delay seconds, and
+streamGenerateContent (?alt=sse) with the same answer split into --chunks
+server-sent events, --chunk-delay seconds apart. Counts the TCP
+connections clients open. Point the bot at it with:
+
+  python benchmarks/gemini_stub.py --port 8089
+  GEMINI_API_BASE=http://127.0.0.1:8089/v1beta python main.py
+"""
+import argparse
+import asyncio
+import json
+
+from aiohttp import web
+
+
+def _candidate(text: str) -> str:
+    return json.dumps({"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]})
+
+
+def make_app(delay: float = 0.0, chunks: int = 20, chunk_delay: float = 0.25) -> web.Application:
+    app = web.Application()
+    app["delay"] = delay
+    app["chunks"] = chunks
+    app["chunk_delay"] = chunk_delay
+    app["peers"] = set()
+    app["requests"] = 0
+
+    async def generate(request: web.Request) -> web.StreamResponse:
+        model, _, method = request.match_info["target"].partition(":")
+        if method not in ("generateContent", "streamGenerateContent"):
+            return web.Response(status=404, text=f"unknown method {method!r}")
+        app["peers"].add(request.transport.get_extra_info("peername"))
+        app["requests"] += 1
+        payload = await request.json()
+        prompt = payload["contents"][0]["parts"][0]["text"]
+        if app["delay"]:
+            await asyncio.sleep(app["delay"])
+        text = f"[{model}] stub answer to a {len(prompt)}-character prompt."
+        if method == "generateContent":
+            return web.Response(text=_candidate(text), content_type="application/json")
+
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await resp.prepare(request)
+        for i in range(app["chunks"]):
+            piece = f"{text} (part {i + 1}/{app['chunks']})\n" if i else text + "\n"
+            await resp.write(f"data: {_candidate(piece)}\r\n\r\n".encode("utf-8"))
+            await asyncio.sleep(app["chunk_delay"])
+        await resp.write_eof()
+        return resp
+
+    app.router.add_post("/v1beta/models/{target}", generate)
+    return app
+
+
+async def start(app: web.Application, host: str = "127.0.0.1", port: int = 0) -> web.AppRunner:
+    """Starts `app`; the bound port is in runner.addresses."""
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--delay", type=float, default=0.5)
+    parser.add_argument("--chunks", type=int, default=20)
+    parser.add_argument("--chunk-delay", type=float, default=0.25)
+    args = parser.parse_args()
+    web.run_app(make_app(args.delay, args.chunks, args.chunk_delay), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Measures how long storage calls block the asyncio event loop.
+
+A ticker coroutine sleeps for 1 ms in a loop and records how late it wakes
+up; that lateness is time the loop could not service anything else, such
+as gateway heartbeats. The same interaction-shaped workload (get a task,
+update it, read config, list the board) runs three ways:
+
+  legacy  parse/dump the whole JSON file per call, inline (the original code)
+  sync    utils.storage called inline from the handler
+  async   utils.async_storage, awaited from the handler
+
+Usage: python benchmarks/loop_blocking.py [--tasks 50000] [--clicks 200]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GUILD_ID = 1
+
+
+def build_dataset(path: str, n_tasks: int, n_guilds: int = 10) -> None:
+    data = {}
+    per_guild = max(1, n_tasks // n_guilds)
+    for g in range(1, n_guilds + 1):
+        tasks = {}
+        for i in range(1, per_guild + 1):
+            tasks[str(i)] = {
+                "id": i,
+                "title": f"Task {i}",
+                "description": "Some description " * 5,
+                "priority": "Medium",
+                "status": "Open" if i % 3 else "Completed",
+                "creator_id": 1000 + i,
+                "assignee_id": None,
+                "message_id": None,
+                "channel_id": None,
+                "thread_id": None,
+            }
+        data[str(g)] = {"counter": per_guild, "tasks": tasks}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+class LagMonitor:
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.lags = []
+        self._stop = False
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while not self._stop:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - start - self.interval))
+
+    def stop(self):
+        self._stop = True
+
+    def summary(self) -> str:
+        lags = sorted(self.lags)
+        if not lags:
+            return "no samples"
+        p99 = lags[int(len(lags) * 0.99) - 1]
+        return f"max={lags[-1] * 1000:8.2f} ms  p99={p99 * 1000:7.2f} ms  total={sum(lags) * 1000:9.1f} ms"
+
+
+def legacy_click(tasks_file: str, config_file: str, task_id: int):
+    # Mirrors the original utils/storage.py: every call re-reads the file.
+    def load(path):
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(path, data):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+    data = load(tasks_file)
+    data[str(GUILD_ID)]["tasks"].get(str(task_id))
+    data = load(tasks_file)
+    data[str(GUILD_ID)]["tasks"][str(task_id)]["status"] = "In Progress"
+    save(tasks_file, data)
+    load(config_file).get(str(GUILD_ID), {})
+    list(load(tasks_file)[str(GUILD_ID)]["tasks"].values())
+
+
+async def run_mode(mode: str, tasks_file: str, config_file: str, clicks: int) -> str:
+    monitor = LagMonitor()
+    ticker = asyncio.create_task(monitor.run())
+    await asyncio.sleep(0.05)
+
+    if mode == "legacy":
+        for i in range(clicks):
+            legacy_click(tasks_file, config_file, i % 100 + 1)
+            await asyncio.sleep(0)
+    elif mode == "sync":
+        from utils import storage
+        for i in range(clicks):
+            storage.get_task(GUILD_ID, i % 100 + 1)
+            storage.update_task(GUILD_ID, i % 100 + 1, status="In Progress")
+            storage.get_server_config(GUILD_ID)
+            storage.query_tasks(GUILD_ID, statuses=storage.OPEN_STATUSES, limit=15)
+            await asyncio.sleep(0)
+        storage.flush()
+    else:
+        from utils import async_storage
+        for i in range(clicks):
+            await async_storage.get_task(GUILD_ID, i % 100 + 1)
+            await async_storage.update_task(GUILD_ID, i % 100 + 1, status="In Progress")
+            await async_storage.get_server_config(GUILD_ID)
+            await async_storage.query_tasks(GUILD_ID, statuses=async_storage.OPEN_STATUSES, limit=15)
+        await async_storage.flush()
+
+    monitor.stop()
+    await ticker
+    return monitor.summary()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=50000)
+    parser.add_argument("--clicks", type=int, default=200)
+    parser.add_argument("--legacy-clicks", type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="loop-bench-")
+    os.chdir(workdir)
+    sys.path.insert(0, ROOT)
+    os.makedirs("data", exist_ok=True)
+    tasks_file = os.path.join("data", "tasks.json")
+    config_file = os.path.join("data", "server_config.json")
+    build_dataset(tasks_file, args.tasks)
+    print(f"{args.tasks} tasks, {os.path.getsize(tasks_file) / 1e6:.1f} MB tasks.json, in {workdir}")
+
+    for mode, clicks in (("legacy", args.legacy_clicks), ("sync", args.clicks), ("async", args.clicks)):
+        start = time.perf_counter()
+        result = asyncio.run(run_mode(mode, tasks_file, config_file, clicks))
+        elapsed = time.perf_counter() - start
+        print(f"{mode:6} {clicks:5} clicks in {elapsed:6.2f}s  loop lag: {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Compares the JSON and binary snapshot formats for one guild's tasks:
+
+  save   encode the guild and write it atomically
+  load   read the file back into Task objects
+  one    open the file and decode a single task (binary only; JSON has to
+         parse the whole file to answer the same question)
+
+Usage: python benchmarks/snapshot_format.py [--sizes 1000,100000,1000000]
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils import snapshot  # noqa: E402
+from utils.json_backend import _GuildTasks, _dump_json, _load_snapshot, _save_bytes  # noqa: E402
+from utils.models import Task, TaskPriority, TaskStatus  # noqa: E402
+
+STATUSES = tuple(TaskStatus)
+PRIORITIES = tuple(TaskPriority)
+
+
+def build_guild(n_tasks: int) -> _GuildTasks:
+    tasks = {}
+    for i in range(1, n_tasks + 1):
+        tasks[i] = Task(
+            id=i,
+            title=f"Task {i}: fix the thing",
+            description=f"Details for task {i}. " * 3,
+            priority=PRIORITIES[i % 3],
+            status=STATUSES[i % 3],
+            creator_id=100000000000000000 + i % 50,
+            assignee_id=200000000000000000 + i % 20 if i % 2 else None,
+            message_id=300000000000000000 + i,
+            channel_id=400000000000000000,
+            thread_id=500000000000000000 + i if i % 5 == 0 else None,
+        )
+    return _GuildTasks(n_tasks, tasks)
+
+
+def timed(fn):
+    gc.collect()
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def run(n_tasks: int, workdir: str) -> None:
+    guild = build_guild(n_tasks)
+    paths = {"json": os.path.join(workdir, "guild.json"), "binary": os.path.join(workdir, "guild.snap")}
+    encoders = {
+        "json": lambda: _dump_json(guild.to_json()).encode("utf-8"),
+        "binary": lambda: snapshot.encode_tasks(guild.counter, guild.tasks.values()),
+    }
+    probe = n_tasks // 2 or 1
+    print(f"{n_tasks} tasks")
+    for fmt, path in paths.items():
+        save, _ = timed(lambda: _save_bytes(path, encoders[fmt]()))
+        load, loaded = timed(lambda: _load_snapshot(path))
+        assert loaded.tasks[probe] == guild.tasks[probe]
+        del loaded
+        line = f"  {fmt:6} {os.path.getsize(path) / 1e6:8.1f} MB  save {save * 1000:9.1f} ms  load {load * 1000:9.1f} ms"
+        if fmt == "binary":
+            def read_one():
+                with snapshot.SnapshotReader(path) as reader:
+                    return reader.read_task(probe)
+            one, task = timed(read_one)
+            assert task == guild.tasks[probe]
+            line += f"  one {one * 1000:7.3f} ms"
+        print(line)
+        os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,100000,1000000")
+    args = parser.parse_args()
+    workdir = tempfile.mkdtemp(prefix="snapshot-bench-")
+    for size in (int(s) for s in args.sizes.split(",")):
+        run(size, workdir)
+    os.rmdir(workdir)
+
+
+if __name__ == "__main__":
+    main()
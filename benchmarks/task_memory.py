@@ -0,0 +1,85 @@
+"""
+Measures resident memory per task for one large guild:
+
+  dicts   the guild's JSON parsed into plain dicts (the pre-model layout)
+  tasks   the same guild held as utils.models.Task objects
+
+Both are measured with tracemalloc after parsing the same JSON text, so the
+numbers include titles, descriptions and IDs but not the text itself.
+
+Usage: python benchmarks/task_memory.py [--tasks 100000]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.models import Task  # noqa: E402
+
+STATUSES = ("Open", "In Progress", "Completed")
+PRIORITIES = ("Low", "Medium", "High")
+
+
+def build_guild_json(n_tasks: int) -> str:
+    tasks = {}
+    for i in range(1, n_tasks + 1):
+        tasks[str(i)] = {
+            "id": i,
+            "title": f"Task {i}: fix the thing",
+            "description": f"Details for task {i}. " * 3,
+            "priority": PRIORITIES[i % 3],
+            "status": STATUSES[i % 3],
+            "creator_id": 100000000000000000 + i % 50,
+            "assignee_id": 200000000000000000 + i % 20 if i % 2 else None,
+            "message_id": 300000000000000000 + i,
+            "channel_id": 400000000000000000,
+            "thread_id": 500000000000000000 + i if i % 5 == 0 else None,
+        }
+    return json.dumps({"counter": n_tasks, "tasks": tasks})
+
+
+def measure(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return size
+
+
+def as_dicts(text: str):
+    return json.loads(text)["tasks"]
+
+
+def as_tasks(text: str):
+    # The raw dicts are dropped as soon as each Task is built, as the
+    # JSON backend does when it loads a snapshot.
+    raw = json.loads(text)["tasks"]
+    tasks = {}
+    for key in list(raw):
+        task = Task.from_dict(raw.pop(key))
+        tasks[task.id] = task
+    return tasks
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=100000)
+    args = parser.parse_args()
+
+    text = build_guild_json(args.tasks)
+    print(f"{args.tasks} tasks, {len(text) / 1e6:.1f} MB of JSON")
+    for name, build in (("dicts", as_dicts), ("tasks", as_tasks)):
+        size = measure(lambda: build(text))
+        print(f"{name:6} {size / 1e6:8.1f} MB  {size / args.tasks:7.0f} bytes/task")
+
+
+if __name__ == "__main__":
+    main()
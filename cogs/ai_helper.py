@@ -1,16 +1,43 @@
 # cogs/ai_helper.py
 import os
-from typing import Literal
+import time
+from typing import AsyncIterator, Literal, Optional
 
-import aiohttp
 import discord
 from discord.ext import commands
 from discord import app_commands
 
-from utils.storage import get_server_config
+from utils import async_storage as storage
+from utils import metrics
+from utils.ai_cache import AICache, cache_key
+from utils.ai_scheduler import QueueFull, Ticket, ai_scheduler
+from utils.gemini import GeminiClient
+from utils.singleflight import SingleFlight
 
 GEMINI_API_KEY_ENV = "GEMINI_API_KEY"
-GEMINI_MODEL = "gemini-1.5-flash"  # valid model name for v1beta
+
+# Stream answers into the response while they are generated ("0" waits for
+# the whole answer), editing it at most once per AI_STREAM_EDIT_INTERVAL.
+AI_STREAMING = os.getenv("AI_STREAMING", "1") != "0"
+AI_STREAM_EDIT_INTERVAL = float(os.getenv("AI_STREAM_EDIT_INTERVAL", "1.0"))
+
+NO_ANSWER_MESSAGE = "No response from AI."
+AI_QUEUE_FULL_MESSAGE = "The AI helper is busy right now. Please try again in a minute."
+
+SYSTEM_PROMPTS = {
+    "brainstorm": (
+        "You are an AI assistant helping a Roblox game development team brainstorm ideas. "
+        "Provide multiple concrete, creative ideas with bullet points or numbered lists."
+    ),
+    "breakdown": (
+        "You are an AI assistant helping a Roblox game developer break down complex tasks. "
+        "Return a list of clear, ordered steps, with small notes or hints."
+    ),
+    "general": (
+        "You are an AI assistant helping a Roblox game developer with scripting, design, and workflow. "
+        "Give concise but useful explanations with examples where necessary."
+    ),
+}
 
 
 class AIHelperView(discord.ui.View):
@@ -59,6 +86,18 @@ class AIHelperCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.api_key = os.getenv(GEMINI_API_KEY_ENV)
+        self.gemini = GeminiClient(self.api_key)
+        self.ai_cache = AICache()
+        # Identical questions asked while one is in flight share its call.
+        self.inflight = SingleFlight("ai_inflight")
+
+    async def cog_load(self):
+        await self.gemini.start()
+
+    async def cog_unload(self):
+        ai_scheduler.close()
+        await self.gemini.close()
+        await self.ai_cache.close()
 
     @app_commands.command(name="aipanel", description="Post the AI helper panel (Gemini) in this channel.")
     async def aipanel(self, interaction: discord.Interaction):
@@ -66,7 +105,7 @@ class AIHelperCog(commands.Cog):
         if not guild:
             return await interaction.response.send_message("Server only.", ephemeral=True)
 
-        cfg = get_server_config(guild.id)
+        cfg = await storage.get_config_snapshot(guild.id)
         if not cfg.get("ai_enabled", False):
             return await interaction.response.send_message(
                 "AI helper is disabled. Ask an admin to run `/config ai enabled:true`.",
@@ -96,13 +135,15 @@ class AIHelperCog(commands.Cog):
 
     async def handle_ai_request(self, interaction: discord.Interaction, mode: str, text: str):
         guild = interaction.guild
+        use_cache = True
         if guild:
-            cfg = get_server_config(guild.id)
+            cfg = await storage.get_config_snapshot(guild.id)
             if not cfg.get("ai_enabled", False):
                 return await interaction.response.send_message(
                     "AI helper is disabled in this server.",
                     ephemeral=True
                 )
+            use_cache = cfg.get("ai_cache", True)
 
         if not self.api_key:
             return await interaction.response.send_message(
@@ -110,34 +151,111 @@ class AIHelperCog(commands.Cog):
                 ephemeral=True
             )
 
-        await interaction.response.defer(thinking=True)
+        system_prompt = SYSTEM_PROMPTS.get(mode, SYSTEM_PROMPTS["general"])
+        user_prompt = text.strip()
 
-        if mode == "brainstorm":
-            system_prompt = (
-                "You are an AI assistant helping a Roblox game development team brainstorm ideas. "
-                "Provide multiple concrete, creative ideas with bullet points or numbered lists."
-            )
-        elif mode == "breakdown":
-            system_prompt = (
-                "You are an AI assistant helping a Roblox game developer break down complex tasks. "
-                "Return a list of clear, ordered steps, with small notes or hints."
-            )
-        else:
-            system_prompt = (
-                "You are an AI assistant helping a Roblox game developer with scripting, design, and workflow. "
-                "Give concise but useful explanations with examples where necessary."
+        # A cached answer goes out as the interaction response itself.
+        key = cache_key(mode, self.gemini.model, user_prompt)
+        if use_cache:
+            cached = await self.ai_cache.get(key)
+            if cached is not None:
+                return await interaction.response.send_message(embed=self.answer_embed(interaction, mode, cached))
+
+        # Guilds that opted out of the cache only share calls among themselves.
+        flight_key = key if use_cache else (guild.id if guild else None, key)
+        guild_id = guild.id if guild else 0
+
+        # Set once this interaction's own response shows a streamed answer.
+        message: Optional[discord.InteractionMessage] = None
+
+        async def show(answer: str) -> discord.InteractionMessage:
+            return await interaction.edit_original_response(
+                content=None,
+                embed=self.answer_embed(interaction, mode, answer)
             )
 
-        user_prompt = text.strip()
+        async def stream() -> Optional[str]:
+            nonlocal message
+            started = time.monotonic()
+            answer, shown, last_edit = "", "", 0.0
+            async for piece in self.stream_gemini_api(system_prompt, user_prompt):
+                answer += piece
+                now = time.monotonic()
+                if message is None:
+                    metrics.observe("ai_first_token_seconds", now - started)
+                    message = await show(answer)
+                elif now - last_edit >= AI_STREAM_EDIT_INTERVAL:
+                    try:
+                        await show(answer)
+                    except discord.HTTPException:
+                        pass  # the next edit catches up
+                else:
+                    continue
+                shown, last_edit = answer, now
+            if not answer:
+                return None
+            if message is not None and shown != answer:
+                await show(answer)
+            return answer
+
+        async def fetch() -> str:
+            nonlocal ticket
+            # `ticket` is None only if the call we meant to join finished
+            # before this one started.
+            slot, ticket = ticket or ai_scheduler.enqueue(guild_id), None
+            async with slot:
+                if AI_STREAMING:
+                    answer = await stream()
+                else:
+                    answer = await self.call_gemini_api(system_prompt, user_prompt)
+            if answer is None:
+                # Not cached: the next ask may well get a real answer.
+                return NO_ANSWER_MESSAGE
+            if use_cache:
+                await self.ai_cache.put(key, answer)
+            return answer
+
+        # Joining a call already in flight costs nothing; anything else needs
+        # a place in the AI queue, and is turned away now if there is none.
+        ticket: Optional[Ticket] = None
+        if flight_key not in self.inflight:
+            try:
+                ticket = ai_scheduler.enqueue(guild_id)
+            except QueueFull:
+                return await interaction.response.send_message(AI_QUEUE_FULL_MESSAGE, ephemeral=True)
+
+        # From here on the ticket must go back however this handler ends
+        # (a failed defer, a cancelled handler), unless fetch() took it.
+        try:
+            await interaction.response.defer(thinking=True)
+            if ticket is not None and ticket.position:
+                await interaction.edit_original_response(
+                    content=f"Queued: position {ticket.position}. Your answer will appear here."
+                )
 
+            try:
+                response_text = await self.inflight.do(flight_key, fetch)
+            except QueueFull:
+                return await self.send_error(interaction, AI_QUEUE_FULL_MESSAGE)
+            except Exception as e:
+                return await self.send_error(interaction, f"Error while contacting AI: {e}")
+        finally:
+            if ticket is not None:
+                ticket.cancel()
+
+        # Requests that joined another's call get the finished answer here.
+        if message is None:
+            await show(response_text)
+
+    async def send_error(self, interaction: discord.Interaction, text: str):
+        """Swaps the public deferred response for a note only the requester sees."""
         try:
-            response_text = await self.call_gemini_api(system_prompt, user_prompt)
-        except Exception as e:
-            return await interaction.followup.send(
-                f"Error while contacting AI: {e}",
-                ephemeral=True
-            )
+            await interaction.delete_original_response()
+        except discord.HTTPException:
+            pass
+        await interaction.followup.send(text, ephemeral=True)
 
+    def answer_embed(self, interaction: discord.Interaction, mode: str, response_text: str) -> discord.Embed:
         embed = discord.Embed(
             title={
                 "brainstorm": "AI Brainstorm Ideas",
@@ -148,42 +266,13 @@ class AIHelperCog(commands.Cog):
             color=discord.Color.purple()
         )
         embed.set_footer(text=f"Requested by {interaction.user}")
+        return embed
 
-        await interaction.followup.send(embed=embed)
-
-    async def call_gemini_api(self, system_prompt: str, user_prompt: str) -> str:
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent"
-        headers = {
-            "Content-Type": "application/json",
-            "x-goog-api-key": self.api_key
-        }
-        payload = {
-            "contents": [
-                {
-                    "role": "user",
-                    "parts": [
-                        {"text": system_prompt + "\n\nUser request:\n" + user_prompt}
-                    ]
-                }
-            ]
-        }
-
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=payload, headers=headers) as resp:
-                text = await resp.text()
-                if resp.status != 200:
-                    raise RuntimeError(f"API error {resp.status}: {text}")
-                data = await resp.json()
-
-        candidates = data.get("candidates", [])
-        if not candidates:
-            return "No response from AI."
-
-        parts = candidates[0].get("content", {}).get("parts", [])
-        if not parts:
-            return "No response from AI."
+    async def call_gemini_api(self, system_prompt: str, user_prompt: str) -> Optional[str]:
+        return await self.gemini.generate(system_prompt + "\n\nUser request:\n" + user_prompt)
 
-        return parts[0].get("text", "No text returned from AI.")
+    def stream_gemini_api(self, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        return self.gemini.stream(system_prompt + "\n\nUser request:\n" + user_prompt)
 
 
 async def setup(bot: commands.Bot):
@@ -6,7 +6,8 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 
-from utils.storage import get_server_config, update_server_config
+from utils import async_storage as storage
+from utils.log_sink import log_sink
 
 GEMINI_API_KEY_ENV = "GEMINI_API_KEY"
 
@@ -26,14 +27,16 @@ class ConfigCog(commands.Cog):
     @app_commands.describe(
         logs_channel="Channel for logging actions",
         tasks_channel="Channel where task panels/messages are posted",
-        dev_category="Category where private dev channels are created"
+        dev_category="Category where private dev channels are created",
+        logs_webhook="Deliver logs through a webhook (needs Manage Webhooks)"
     )
     async def config_channels(
         self,
         interaction: discord.Interaction,
         logs_channel: Optional[discord.TextChannel],
         tasks_channel: Optional[discord.TextChannel],
-        dev_category: Optional[discord.CategoryChannel]
+        dev_category: Optional[discord.CategoryChannel],
+        logs_webhook: Optional[bool] = None
     ):
         guild = interaction.guild
         if not guild:
@@ -42,26 +45,52 @@ class ConfigCog(commands.Cog):
                 ephemeral=True
             )
 
-        cfg = get_server_config(guild.id)
+        # Write back only what this command changes, so settings saved by
+        # other commands meanwhile (e.g. the task board IDs) are kept.
+        changes = {}
         if logs_channel:
-            cfg["logs_channel_id"] = logs_channel.id
+            changes["logs_channel_id"] = logs_channel.id
         if tasks_channel:
-            cfg["tasks_channel_id"] = tasks_channel.id
+            changes["tasks_channel_id"] = tasks_channel.id
         if dev_category:
-            cfg["dev_category_id"] = dev_category.id
-
-        update_server_config(guild.id, **cfg)
+            changes["dev_category_id"] = dev_category.id
+        if logs_webhook is not None:
+            changes["logs_webhook"] = logs_webhook
+
+        cfg = {**await storage.get_config_snapshot(guild.id), **changes}
+        if cfg.get("logs_webhook"):
+            logs = guild.get_channel(cfg.get("logs_channel_id") or 0)
+            if not isinstance(logs, discord.TextChannel):
+                return await interaction.response.send_message(
+                    "Set a logs channel before enabling webhook logging.",
+                    ephemeral=True
+                )
+            await interaction.response.defer(ephemeral=True)
+            if await log_sink.create_webhook(logs) is None:
+                return await interaction.followup.send(
+                    f"Could not create a webhook in {logs.mention}; "
+                    "the bot needs the Manage Webhooks permission there.",
+                    ephemeral=True
+                )
+            await storage.update_server_config(guild.id, **changes)
+            return await interaction.followup.send("Configuration updated.", ephemeral=True)
+
+        await storage.update_server_config(guild.id, **changes)
         await interaction.response.send_message(
             "Configuration updated.",
             ephemeral=True
         )
 
     @config_group.command(name="ai", description="Enable/disable AI helper.")
-    @app_commands.describe(enabled="Enable (true) or disable (false) AI helper.")
+    @app_commands.describe(
+        enabled="Enable (true) or disable (false) AI helper.",
+        cache="Reuse stored answers for repeated questions (default true)"
+    )
     async def config_ai(
         self,
         interaction: discord.Interaction,
-        enabled: bool
+        enabled: bool,
+        cache: Optional[bool] = None
     ):
         guild = interaction.guild
         if not guild:
@@ -76,9 +105,11 @@ class ConfigCog(commands.Cog):
                 ephemeral=True
             )
 
-        cfg = get_server_config(guild.id)
-        cfg["ai_enabled"] = enabled
-        update_server_config(guild.id, **cfg)
+        changes = {"ai_enabled": enabled}
+        if cache is not None:
+            changes["ai_cache"] = cache
+        async with storage.guild_txn(guild.id) as txn:
+            await txn.update_server_config(**changes)
         await interaction.response.send_message(
             f"AI helper {'enabled' if enabled else 'disabled'} for this server.",
             ephemeral=True
@@ -93,17 +124,21 @@ class ConfigCog(commands.Cog):
                 ephemeral=True
             )
 
-        cfg = get_server_config(guild.id)
+        cfg = await storage.get_config_snapshot(guild.id)
         logs_id = cfg.get("logs_channel_id")
         tasks_id = cfg.get("tasks_channel_id")
         dev_cat_id = cfg.get("dev_category_id")
         ai_enabled = cfg.get("ai_enabled", False)
+        ai_cache = cfg.get("ai_cache", True)
+        logs_webhook = cfg.get("logs_webhook", False)
 
         desc = []
         desc.append(f"Logs channel: <#{logs_id}>" if logs_id else "Logs channel: not set")
         desc.append(f"Tasks channel: <#{tasks_id}>" if tasks_id else "Tasks channel: not set")
+        desc.append(f"Logs via webhook: {logs_webhook}")
         desc.append(f"Dev category: <#{dev_cat_id}>" if dev_cat_id else "Dev category: not set")
         desc.append(f"AI enabled: {ai_enabled}")
+        desc.append(f"AI answer cache: {ai_cache}")
 
         embed = discord.Embed(
             title="Server Configuration",
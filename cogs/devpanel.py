@@ -5,7 +5,10 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 
-from utils.storage import get_server_config, update_server_config
+from utils import async_storage as storage
+from utils.jobs import jobs, record_ack
+from utils.log_sink import log_sink
+from utils.outbound import Priority, channel_route, outbound
 
 
 class DevSelect(discord.ui.Select):
@@ -52,12 +55,12 @@ class DevPanelCog(commands.Cog):
         if not guild:
             return await interaction.response.send_message("Server only.", ephemeral=True)
 
-        cfg = get_server_config(guild.id)
-        devs = cfg.get("dev_ids", [])
-        if user.id not in devs:
-            devs.append(user.id)
-        cfg["dev_ids"] = devs
-        update_server_config(guild.id, **cfg)
+        async with storage.guild_txn(guild.id) as txn:
+            cfg = await txn.get_server_config()
+            devs = cfg.get("dev_ids", [])
+            if user.id not in devs:
+                devs.append(user.id)
+            await txn.update_server_config(dev_ids=devs)
 
         await interaction.response.send_message(f"{user.mention} added as a dev contact.", ephemeral=True)
 
@@ -69,12 +72,12 @@ class DevPanelCog(commands.Cog):
         if not guild:
             return await interaction.response.send_message("Server only.", ephemeral=True)
 
-        cfg = get_server_config(guild.id)
-        devs = cfg.get("dev_ids", [])
-        if user.id in devs:
-            devs.remove(user.id)
-        cfg["dev_ids"] = devs
-        update_server_config(guild.id, **cfg)
+        async with storage.guild_txn(guild.id) as txn:
+            cfg = await txn.get_server_config()
+            devs = cfg.get("dev_ids", [])
+            if user.id in devs:
+                devs.remove(user.id)
+            await txn.update_server_config(dev_ids=devs)
 
         await interaction.response.send_message(f"{user.mention} removed from dev contacts.", ephemeral=True)
 
@@ -85,7 +88,7 @@ class DevPanelCog(commands.Cog):
         if not guild:
             return await interaction.response.send_message("Server only.", ephemeral=True)
 
-        cfg = get_server_config(guild.id)
+        cfg = await storage.get_config_snapshot(guild.id)
         devs = cfg.get("dev_ids", [])
         if not devs:
             return await interaction.response.send_message("No developers configured. Use `/devpanel add` first.", ephemeral=True)
@@ -99,15 +102,26 @@ class DevPanelCog(commands.Cog):
             ),
             color=discord.Color.green()
         )
-        await interaction.channel.send(embed=embed, view=view)
         await interaction.response.send_message("Dev panel created.", ephemeral=True)
+        record_ack(interaction)
+
+        channel = interaction.channel
+        jobs.spawn(
+            "dev panel",
+            lambda: outbound.run(
+                Priority.TASK_EDIT,
+                channel_route(channel.id),
+                lambda: channel.send(embed=embed, view=view)
+            ),
+            idempotent=False
+        )
 
     async def handle_open_dev_channel(self, interaction: discord.Interaction, dev_id: int):
         guild = interaction.guild
         if not guild:
             return await interaction.response.send_message("Server only.", ephemeral=True)
 
-        cfg = get_server_config(guild.id)
+        cfg = await storage.get_config_snapshot(guild.id)
         cat_id = cfg.get("dev_category_id")
         if not cat_id:
             return await interaction.response.send_message(
@@ -125,6 +139,10 @@ class DevPanelCog(commands.Cog):
 
         user = interaction.user
 
+        # Channel creation can take a while; ack before starting it.
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        record_ack(interaction)
+
         # Create a private channel
         overwrites = {
             guild.default_role: discord.PermissionOverwrite(view_channel=False),
@@ -140,25 +158,25 @@ class DevPanelCog(commands.Cog):
             topic=f"Private dev channel between {user} and {dev_member}"
         )
 
-        await channel.send(
-            content=(
-                f"Private dev channel opened.\n"
-                f"- User: {user.mention}\n"
-                f"- Developer: {dev_member.mention}\n\n"
-                f"Use this channel to discuss your task or project in detail."
-            )
-        )
-
-        await interaction.response.send_message(
+        await interaction.followup.send(
             f"Private dev channel created: {channel.mention}",
             ephemeral=True
         )
 
+        intro = (
+            f"Private dev channel opened.\n"
+            f"- User: {user.mention}\n"
+            f"- Developer: {dev_member.mention}\n\n"
+            f"Use this channel to discuss your task or project in detail."
+        )
+        jobs.spawn(
+            f"dev channel intro {channel.id}",
+            lambda: outbound.run(Priority.TASK_EDIT, channel_route(channel.id), lambda: channel.send(content=intro)),
+            idempotent=False
+        )
+
         # Log it
-        from cogs.tasks import TasksCog  # to reuse log_action style is messy; so do direct log
-        from utils.storage import get_server_config
-        cfg2 = get_server_config(guild.id)
-        logs_id = cfg2.get("logs_channel_id")
+        logs_id = cfg.get("logs_channel_id")
         if logs_id:
             logs_channel = guild.get_channel(logs_id)
             if logs_channel and isinstance(logs_channel, discord.TextChannel):
@@ -171,7 +189,7 @@ class DevPanelCog(commands.Cog):
                     ),
                     color=discord.Color.dark_green()
                 )
-                await logs_channel.send(embed=embed)
+                log_sink.post(logs_channel, embed, via_webhook=cfg.get("logs_webhook", False))
 
 
 async def setup(bot: commands.Bot):
@@ -1,17 +1,29 @@
 # cogs/tasks.py
-from typing import Optional, List
+import os
+import re
+import time
+from typing import Any, Mapping, Optional, Tuple
 
 import discord
 from discord.ext import commands
 from discord import app_commands
 
-from utils.storage import (
-    get_server_config,
-    create_task,
-    update_task,
-    get_task,
-    list_tasks,
-)
+from utils import async_storage as storage
+from utils import metrics
+from utils import task_render
+from utils.coalesce import Coalescer
+from utils.jobs import jobs, record_ack
+from utils.log_sink import log_sink
+from utils.message_cache import DeletedMessages, SentContent
+from utils.models import Task, TaskStatus
+from utils.outbound import Priority, channel_route, outbound
+
+# The board message is edited at most once per this many seconds per guild;
+# changes in between are folded into the next edit.
+BOARD_REFRESH_WINDOW = float(os.getenv("BOARD_REFRESH_WINDOW", "10"))
+
+# Tasks per /tasks page (at most 25, Discord's limit on embed fields).
+TASKS_PAGE_SIZE = min(int(os.getenv("TASKS_PAGE_SIZE", "20")), 25)
 
 
 class TaskCreateModal(discord.ui.Modal, title="Create New Task"):
@@ -46,7 +58,7 @@ class TaskCreateModal(discord.ui.Modal, title="Create New Task"):
                 ephemeral=True
             )
 
-        cfg = get_server_config(guild.id)
+        cfg = await storage.get_config_snapshot(guild.id)
         tasks_channel_id = cfg.get("tasks_channel_id")
         if not tasks_channel_id:
             return await interaction.response.send_message(
@@ -64,39 +76,37 @@ class TaskCreateModal(discord.ui.Modal, title="Create New Task"):
         priority = self.priority_input.value.strip() or "Medium"
         creator = interaction.user
 
-        # Create task entry
-        task = create_task(
-            guild_id=guild.id,
-            creator_id=creator.id,
-            title=self.title_input.value,
-            description=self.description_input.value,
-            priority=priority,
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        record_ack(interaction)
+
+        # Reserve the ID and post the message outside the guild lock, so a
+        # slow send doesn't hold up other task clicks, then store the task
+        # with its message in one short write. If sending fails nothing is
+        # stored; the reserved ID is just skipped.
+        task_id = await storage.allocate_task_id(guild.id)
+        task = storage.build_task(
+            task_id,
+            creator.id,
+            self.title_input.value,
+            self.description_input.value,
+            priority,
+            channel_id=tasks_channel.id,
         )
 
-        task_id = task["id"]
-
-        embed = discord.Embed(
-            title=f"[Task #{task_id}] {task['title']}",
-            description=task["description"],
-            color=discord.Color.orange()
-        )
-        embed.add_field(name="Priority", value=priority, inline=True)
-        embed.add_field(name="Status", value="Open", inline=True)
-        embed.add_field(name="Assignee", value="Unassigned", inline=True)
-        embed.set_footer(text=f"Created by {creator} (ID: {creator.id})")
-
-        view = TaskMainView(self.cog, task_id)
-        msg = await tasks_channel.send(embed=embed, view=view)
-
-        # Update task with message/channel IDs
-        update_task(
-            guild_id=guild.id,
-            task_id=task_id,
-            message_id=msg.id,
-            channel_id=tasks_channel.id
+        embed = task_render.task_embed(guild.id, task)
+        view = TaskMainView(task_id)
+        msg = await outbound.run(
+            Priority.TASK_EDIT,
+            channel_route(tasks_channel.id),
+            lambda: tasks_channel.send(embed=embed, view=view)
         )
+        self.cog.sent_content.remember(msg.id, task_render.content_digest(embed=embed, view=view))
 
-        await interaction.response.send_message(
+        task.message_id = msg.id
+        async with storage.guild_txn(guild.id) as txn:
+            txn.add_task(task)
+
+        await interaction.followup.send(
             f"Task #{task_id} created in {tasks_channel.mention}.",
             ephemeral=True
         )
@@ -105,26 +115,168 @@ class TaskCreateModal(discord.ui.Modal, title="Create New Task"):
         await self.cog.log_action(
             guild,
             title=f"Task #{task_id} created",
-            description=f"**Title:** {task['title']}\n**Creator:** {creator.mention}"
+            description=f"**Title:** {task.title}\n**Creator:** {creator.mention}",
+            cfg=cfg
         )
 
         # Update task board (if configured)
         await self.cog.update_task_board(guild)
 
 
-class TaskMainView(discord.ui.View):
-    def __init__(self, cog: "TasksCog", task_id: int):
-        super().__init__(timeout=None)
-        self.cog = cog
+# action -> (label, style, TasksCog handler taking (interaction, task_id))
+TASK_BUTTONS = {
+    "assign": ("Assign to Developer", discord.ButtonStyle.primary, "handle_assign_other"),
+    "thread": ("Open Task Thread", discord.ButtonStyle.success, "handle_open_thread"),
+    "progress": ("Mark In Progress", discord.ButtonStyle.primary, "handle_mark_in_progress"),
+    "submit": ("Submit Work", discord.ButtonStyle.secondary, "handle_submit_work"),
+    "done": ("Mark Done", discord.ButtonStyle.success, "handle_mark_done"),
+}
+
+
+class TaskButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=rf"task:(?P<action>{'|'.join(TASK_BUTTONS)}):(?P<task_id>[0-9]+)",
+):
+    """
+    A task button whose custom_id carries the action and the task ID, e.g.
+    `task:assign:42`. The class is registered once with add_dynamic_items,
+    so buttons on every task message keep working across restarts without
+    a View kept in memory per message.
+    """
+
+    def __init__(self, action: str, task_id: int):
+        label, style, _ = TASK_BUTTONS[action]
+        super().__init__(discord.ui.Button(label=label, style=style, custom_id=f"task:{action}:{task_id}"))
+        self.action = action
         self.task_id = task_id
 
-    @discord.ui.button(label="Assign to Developer", style=discord.ButtonStyle.primary, custom_id="task_assign_other")
-    async def assign_other(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.cog.handle_assign_other(interaction, self.task_id)
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match["action"], int(match["task_id"]))
+
+    async def callback(self, interaction: discord.Interaction):
+        cog = interaction.client.get_cog("TasksCog")
+        if cog is None:
+            return await interaction.response.send_message("Tasks are unavailable right now.", ephemeral=True)
+        await getattr(cog, TASK_BUTTONS[self.action][2])(interaction, self.task_id)
+
+
+# Static custom_ids used by task and thread buttons before TaskButton.
+LEGACY_TASK_BUTTONS = {
+    "task_assign_other": "assign",
+    "task_open_thread": "thread",
+    "task_in_progress": "progress",
+    "task_submit_work": "submit",
+    "task_mark_done": "done",
+}
+_TASK_ID_RE = re.compile(r"Task #([0-9]+)")
+
+
+def _legacy_task_id(interaction: discord.Interaction) -> Optional[int]:
+    """The task a pre-TaskButton message belongs to, from its own text."""
+    message = interaction.message
+    texts = [embed.title or "" for embed in message.embeds] if message else []
+    if message:
+        texts.append(message.content or "")
+    if isinstance(interaction.channel, discord.Thread):
+        texts.append(interaction.channel.name)
+    for text in texts:
+        match = _TASK_ID_RE.search(text)
+        if match:
+            return int(match.group(1))
+    return None
+
+
+class LegacyTaskButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=rf"(?P<custom_id>{'|'.join(LEGACY_TASK_BUTTONS)})",
+):
+    """
+    Buttons on task and thread messages sent before TaskButton, whose
+    custom_id doesn't say which task they are for. The task ID is read from
+    the message (the embed title "[Task #42] ...", the thread intro "Thread
+    for **Task #42**" or the thread name), the click is handled as usual
+    and the message is then re-rendered with TaskButtons.
+    """
+
+    def __init__(self, custom_id: str):
+        label, style, _ = TASK_BUTTONS[LEGACY_TASK_BUTTONS[custom_id]]
+        super().__init__(discord.ui.Button(label=label, style=style, custom_id=custom_id))
+        self.action = LEGACY_TASK_BUTTONS[custom_id]
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match["custom_id"])
 
-    @discord.ui.button(label="Open Task Thread", style=discord.ButtonStyle.success, custom_id="task_open_thread")
-    async def open_thread(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.cog.handle_open_thread(interaction, self.task_id)
+    async def callback(self, interaction: discord.Interaction):
+        cog = interaction.client.get_cog("TasksCog")
+        if cog is None:
+            return await interaction.response.send_message("Tasks are unavailable right now.", ephemeral=True)
+        task_id = _legacy_task_id(interaction)
+        if task_id is None or not interaction.guild:
+            return await interaction.response.send_message("Task not found.", ephemeral=True)
+        await getattr(cog, TASK_BUTTONS[self.action][2])(interaction, task_id)
+
+        metrics.incr("legacy_task_buttons")
+        if self.action in ("assign", "thread"):
+            cog.refresh_task_later(interaction.guild, task_id)
+        else:
+            channel, message_id = interaction.channel, interaction.message.id
+            jobs.spawn(
+                f"upgrade thread buttons {channel.id}",
+                lambda: cog.edit_message(channel, message_id, view=TaskThreadView(task_id))
+            )
+
+
+# One-letter status filters for /tasks page buttons; "a" means any status.
+_LIST_STATUS_CODES = {"a": None, "o": TaskStatus.OPEN, "p": TaskStatus.IN_PROGRESS, "c": TaskStatus.COMPLETED}
+_LIST_STATUS_KEYS = {status: code for code, status in _LIST_STATUS_CODES.items()}
+
+
+class TaskListButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"tasks:(?P<direction>next|prev):(?P<cursor>[0-9]+):(?P<status>[aopc]):(?P<assignee>[0-9]+)",
+):
+    """
+    Next/previous page of a /tasks listing. The custom_id holds the whole
+    query - direction, cursor task ID, status filter and assignee (0 for
+    anyone) - so pages keep working across restarts with nothing stored.
+    """
+
+    def __init__(self, direction: str, cursor: int, status: str, assignee: int, disabled: bool = False):
+        super().__init__(discord.ui.Button(
+            label="Next" if direction == "next" else "Previous",
+            style=discord.ButtonStyle.secondary,
+            custom_id=f"tasks:{direction}:{cursor}:{status}:{assignee}",
+            disabled=disabled,
+        ))
+        self.direction = direction
+        self.cursor = cursor
+        self.status = status
+        self.assignee = assignee
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match["direction"], int(match["cursor"]), match["status"], int(match["assignee"]))
+
+    async def callback(self, interaction: discord.Interaction):
+        cog = interaction.client.get_cog("TasksCog")
+        if cog is None:
+            return await interaction.response.send_message("Tasks are unavailable right now.", ephemeral=True)
+        await cog.handle_task_page(
+            interaction,
+            _LIST_STATUS_CODES[self.status],
+            self.assignee or None,
+            after_id=self.cursor if self.direction == "next" else None,
+            before_id=self.cursor if self.direction == "prev" else None,
+        )
+
+
+class TaskMainView(discord.ui.View):
+    def __init__(self, task_id: int):
+        super().__init__(timeout=None)
+        self.add_item(TaskButton("assign", task_id))
+        self.add_item(TaskButton("thread", task_id))
 
 
 class AssignUserSelect(discord.ui.UserSelect):
@@ -150,22 +302,11 @@ class AssignUserView(discord.ui.View):
 
 
 class TaskThreadView(discord.ui.View):
-    def __init__(self, cog: "TasksCog", task_id: int):
+    def __init__(self, task_id: int):
         super().__init__(timeout=None)
-        self.cog = cog
-        self.task_id = task_id
-
-    @discord.ui.button(label="Mark In Progress", style=discord.ButtonStyle.primary, custom_id="task_in_progress")
-    async def in_progress(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.cog.handle_status_change(interaction, self.task_id, "In Progress")
-
-    @discord.ui.button(label="Submit Work", style=discord.ButtonStyle.secondary, custom_id="task_submit_work")
-    async def submit_work(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.cog.handle_submit_work(interaction, self.task_id)
-
-    @discord.ui.button(label="Mark Done", style=discord.ButtonStyle.success, custom_id="task_mark_done")
-    async def mark_done(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.cog.handle_mark_done(interaction, self.task_id)
+        self.add_item(TaskButton("progress", task_id))
+        self.add_item(TaskButton("submit", task_id))
+        self.add_item(TaskButton("done", task_id))
 
 
 class SubmitWorkModal(discord.ui.Modal, title="Submit Work for Task"):
@@ -199,6 +340,16 @@ class TaskPanelView(discord.ui.View):
 class TasksCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.board_refresher = Coalescer(self._refresh_board, BOARD_REFRESH_WINDOW, "board_refresh")
+        self.deleted_messages = DeletedMessages()
+        self.sent_content = SentContent()
+
+    async def cog_unload(self):
+        await self.board_refresher.close()
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        self.deleted_messages.add(payload.message_id)
 
     # ===== Slash commands =====
 
@@ -226,8 +377,19 @@ class TasksCog(commands.Cog):
             color=discord.Color.blurple()
         )
 
-        await interaction.channel.send(embed=embed, view=view)
         await interaction.response.send_message("Task panel created.", ephemeral=True)
+        record_ack(interaction)
+
+        channel = interaction.channel
+        jobs.spawn(
+            "task panel",
+            lambda: outbound.run(
+                Priority.TASK_EDIT,
+                channel_route(channel.id),
+                lambda: channel.send(embed=embed, view=view)
+            ),
+            idempotent=False
+        )
 
     @app_commands.command(name="tasks", description="List tasks for this server.")
     @app_commands.describe(
@@ -244,45 +406,104 @@ class TasksCog(commands.Cog):
         if not guild:
             return await interaction.response.send_message("Server only.", ephemeral=True)
 
-        all_tasks = list_tasks(guild.id)
-        user_id = interaction.user.id
+        known_status = storage.normalize_status(status) if status else None
+        assignee_id = interaction.user.id if mine else None
 
-        # Filter tasks
-        filtered: List[dict] = []
-        for t in all_tasks.values():
-            if status and t["status"].lower() != status.lower():
-                continue
-            if mine and t.get("assignee_id") != user_id:
-                continue
-            filtered.append(t)
-
-        if not filtered:
+        embed, view = None, None
+        if not status or known_status:
+            embed, view = await self.task_list_page(guild, known_status, assignee_id)
+        if embed is None:
             return await interaction.response.send_message(
                 "No tasks found with that filter.",
                 ephemeral=True
             )
 
+        await interaction.response.send_message(embed=embed, view=view, ephemeral=False)
+
+    async def handle_task_page(
+        self,
+        interaction: discord.Interaction,
+        status: Optional[TaskStatus],
+        assignee_id: Optional[int],
+        after_id: Optional[int] = None,
+        before_id: Optional[int] = None
+    ):
+        guild = interaction.guild
+        if not guild:
+            return await interaction.response.send_message("Server only.", ephemeral=True)
+
+        embed, view = await self.task_list_page(guild, status, assignee_id, after_id, before_id)
+        if embed is None:
+            return await interaction.response.edit_message(
+                content="No tasks found with that filter.",
+                embed=None,
+                view=None
+            )
+        await interaction.response.edit_message(embed=embed, view=view)
+        record_ack(interaction)
+
+    async def task_list_page(
+        self,
+        guild: discord.Guild,
+        status: Optional[TaskStatus],
+        assignee_id: Optional[int],
+        after_id: Optional[int] = None,
+        before_id: Optional[int] = None
+    ) -> Tuple[Optional[discord.Embed], Optional[discord.ui.View]]:
+        """
+        One page of /tasks, starting after `after_id` or ending before
+        `before_id` (the first page if neither). Fetches one task past the
+        page to learn whether another page follows. Only the first page
+        counts the matching tasks; later pages cost one page-sized query.
+        """
+        statuses = [status] if status else None
+        total: Optional[int] = None
+        if after_id is None and before_id is None:
+            total = await storage.count_tasks(guild.id, statuses=statuses, assignee_id=assignee_id)
+            if not total:
+                return None, None
+
+        seq = storage.task_write_seq(guild.id)
+        page = await storage.query_tasks(
+            guild.id,
+            statuses=statuses,
+            assignee_id=assignee_id,
+            limit=TASKS_PAGE_SIZE + 1,
+            after_id=after_id,
+            before_id=before_id
+        )
+        if before_id is not None:
+            has_prev, has_next = len(page) > TASKS_PAGE_SIZE, True
+            page = page[-TASKS_PAGE_SIZE:]
+        else:
+            has_prev, has_next = after_id is not None, len(page) > TASKS_PAGE_SIZE
+            page = page[:TASKS_PAGE_SIZE]
+        if not page:
+            # Tasks past the cursor changed since the page was shown.
+            if after_id is None and before_id is None:
+                return None, None
+            return await self.task_list_page(guild, status, assignee_id)
+
+        description = f"Showing #{page[0].id} to #{page[-1].id}."
+        if total is not None:
+            description = f"Found {total} task(s). {description}"
         embed = discord.Embed(
             title="Task List",
-            description=f"Found {len(filtered)} task(s).",
+            description=description,
             color=discord.Color.blue()
         )
-
-        # Show up to 20 tasks
-        for t in sorted(filtered, key=lambda x: x["id"])[:20]:
-            assignee = f"<@{t['assignee_id']}>" if t.get("assignee_id") else "Unassigned"
-            line = (
-                f"**Title:** {t['title']}\n"
-                f"**Status:** {t['status']} | **Priority:** {t['priority']}\n"
-                f"**Assignee:** {assignee}"
-            )
-            embed.add_field(
-                name=f"Task #{t['id']}",
-                value=line,
-                inline=False
-            )
-
-        await interaction.response.send_message(embed=embed, ephemeral=False)
+        for t in page:
+            name, value = task_render.task_field(guild.id, t, seq)
+            embed.add_field(name=name, value=value, inline=False)
+
+        if not has_prev and not has_next:
+            return embed, None
+        status_key = _LIST_STATUS_KEYS[status]
+        assignee = assignee_id or 0
+        view = discord.ui.View(timeout=None)
+        view.add_item(TaskListButton("prev", page[0].id, status_key, assignee, disabled=not has_prev))
+        view.add_item(TaskListButton("next", page[-1].id, status_key, assignee, disabled=not has_next))
+        return embed, view
 
     @app_commands.command(
         name="tasksboard",
@@ -298,19 +519,26 @@ class TasksCog(commands.Cog):
         if not guild:
             return await interaction.response.send_message("Server only.", ephemeral=True)
 
-        cfg = get_server_config(guild.id)
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        record_ack(interaction)
+
+        cfg = await storage.get_config_snapshot(guild.id)
         board_channel_id = cfg.get("task_board_channel_id")
         board_message_id = cfg.get("task_board_message_id")
 
         # If an old board exists, try to delete it
-        if board_channel_id and board_message_id:
+        if board_channel_id and board_message_id and board_message_id not in self.deleted_messages:
             old_channel = guild.get_channel(board_channel_id)
             if isinstance(old_channel, discord.TextChannel):
                 try:
-                    old_msg = await old_channel.fetch_message(board_message_id)
-                    await old_msg.delete()
+                    await outbound.run(
+                        Priority.BOARD,
+                        channel_route(old_channel.id),
+                        old_channel.get_partial_message(board_message_id).delete
+                    )
                 except discord.NotFound:
                     pass
+                self.deleted_messages.add(board_message_id)
 
         # Create new board message in current channel
         embed = discord.Embed(
@@ -318,27 +546,34 @@ class TasksCog(commands.Cog):
             description="Loading tasks...",
             color=discord.Color.teal()
         )
-        msg = await interaction.channel.send(embed=embed)
+        channel = interaction.channel
+        msg = await outbound.run(Priority.BOARD, channel_route(channel.id), lambda: channel.send(embed=embed))
 
-        from utils.storage import update_server_config as _update
-        _update(
+        await storage.update_server_config(
             guild.id,
             task_board_channel_id=interaction.channel.id,
             task_board_message_id=msg.id
         )
 
         # Update board content
-        await self.update_task_board(guild)
+        await self.render_task_board(guild)
 
-        await interaction.response.send_message(
+        await interaction.followup.send(
             f"Task board created/updated in {interaction.channel.mention}.",
             ephemeral=True
         )
 
     # ===== Logging & board helpers =====
 
-    async def log_action(self, guild: discord.Guild, title: str, description: str):
-        cfg = get_server_config(guild.id)
+    async def log_action(
+        self,
+        guild: discord.Guild,
+        title: str,
+        description: str,
+        cfg: Optional[Mapping[str, Any]] = None
+    ):
+        if cfg is None:
+            cfg = await storage.get_config_snapshot(guild.id)
         logs_id = cfg.get("logs_channel_id")
         if not logs_id:
             return
@@ -350,14 +585,27 @@ class TasksCog(commands.Cog):
             description=description,
             color=discord.Color.dark_grey()
         )
-        await channel.send(embed=embed)
+        log_sink.post(channel, embed, via_webhook=cfg.get("logs_webhook", False))
 
     async def update_task_board(self, guild: discord.Guild):
+        """
+        Marks the guild's task board as stale. The refresh itself runs in
+        the background, at most once per BOARD_REFRESH_WINDOW.
+        """
+        self.board_refresher.request(guild.id)
+
+    async def _refresh_board(self, guild_id: int):
+        guild = self.bot.get_guild(guild_id)
+        if guild:
+            await self.render_task_board(guild)
+
+    async def render_task_board(self, guild: discord.Guild, cfg: Optional[Mapping[str, Any]] = None):
         """
         Updates the persistent task board message with current tasks.
         Shows open & in-progress tasks; completed are summarized.
         """
-        cfg = get_server_config(guild.id)
+        if cfg is None:
+            cfg = await storage.get_config_snapshot(guild.id)
         board_channel_id = cfg.get("task_board_channel_id")
         board_message_id = cfg.get("task_board_message_id")
 
@@ -365,120 +613,155 @@ class TasksCog(commands.Cog):
             return
 
         channel = guild.get_channel(board_channel_id)
-        if not isinstance(channel, discord.TextChannel):
-            return
-
-        try:
-            msg = await channel.fetch_message(board_message_id)
-        except discord.NotFound:
+        if not isinstance(channel, discord.TextChannel) or board_message_id in self.deleted_messages:
             return
 
-        all_tasks = list_tasks(guild.id)
-        if not all_tasks:
+        open_count = await storage.count_tasks(guild.id, statuses=storage.OPEN_STATUSES)
+        done_count = await storage.count_tasks(guild.id, statuses=[TaskStatus.COMPLETED])
+        if not open_count and not done_count:
             embed = discord.Embed(
                 title="Task Board",
                 description="No tasks yet.",
                 color=discord.Color.teal()
             )
-            await msg.edit(embed=embed)
+            await self.edit_message(channel, board_message_id, priority=Priority.BOARD, embed=embed)
             return
 
-        open_tasks = [t for t in all_tasks.values() if t["status"] in ("Open", "In Progress")]
-        done_tasks = [t for t in all_tasks.values() if t["status"] == "Completed"]
-
         embed = discord.Embed(
             title="Task Board",
-            description=f"Open/In Progress: {len(open_tasks)} | Completed: {len(done_tasks)}",
+            description=f"Open/In Progress: {open_count} | Completed: {done_count}",
             color=discord.Color.teal()
         )
 
         # Show up to 15 open/in-progress tasks
-        for t in sorted(open_tasks, key=lambda x: x["id"])[:15]:
-            assignee = f"<@{t['assignee_id']}>" if t.get("assignee_id") else "Unassigned"
-            line = (
-                f"**Title:** {t['title']}\n"
-                f"**Status:** {t['status']} | **Priority:** {t['priority']}\n"
-                f"**Assignee:** {assignee}"
-            )
-            embed.add_field(
-                name=f"Task #{t['id']}",
-                value=line,
-                inline=False
-            )
-
-        if done_tasks:
-            done_ids = ", ".join(
-                f"#{t['id']}" for t in sorted(done_tasks, key=lambda x: x["id"])[:20]
-            )
-            embed.add_field(
-                name="Recently Completed",
-                value=done_ids,
-                inline=False
+        seq = storage.task_write_seq(guild.id)
+        for t in await storage.query_tasks(guild.id, statuses=storage.OPEN_STATUSES, limit=15):
+            name, value = task_render.task_field(guild.id, t, seq)
+            embed.add_field(name=name, value=value, inline=False)
+
+        if done_count:
+            # Archived tasks are older than anything still loaded; skip them.
+            done_tasks = await storage.query_tasks(
+                guild.id, statuses=[TaskStatus.COMPLETED], limit=20, include_archived=False
             )
+            done_ids = ", ".join(f"#{t.id}" for t in done_tasks)
+            if done_ids:
+                embed.add_field(
+                    name="Recently Completed",
+                    value=done_ids,
+                    inline=False
+                )
 
-        await msg.edit(embed=embed)
+        await self.edit_message(channel, board_message_id, priority=Priority.BOARD, embed=embed)
 
     # ===== Internal helpers =====
 
-    async def refresh_task_message(self, guild: discord.Guild, task: dict):
-        channel = guild.get_channel(task.get("channel_id"))
-        message_id = task.get("message_id")
-        if not channel or not isinstance(channel, discord.TextChannel) or not message_id:
-            return
-
+    async def edit_message(
+        self,
+        channel: discord.TextChannel,
+        message_id: int,
+        priority: Priority = Priority.TASK_EDIT,
+        **fields
+    ) -> bool:
+        """
+        Edit a message by ID through a partial handle, without fetching it
+        first. Skipped if it would leave the message looking the same.
+        Returns False if the message is gone.
+        """
+        if message_id in self.deleted_messages:
+            return False
+        digest = task_render.content_digest(**fields)
+        if self.sent_content.unchanged(message_id, digest):
+            metrics.incr("message_edit_unchanged")
+            return True
+        # Recorded before the edit is queued, so a later edit back to the
+        # previous content isn't mistaken for a no-op.
+        self.sent_content.remember(message_id, digest)
+        message = channel.get_partial_message(message_id)
         try:
-            msg = await channel.fetch_message(message_id)
+            await outbound.run(priority, channel_route(channel.id), lambda: message.edit(**fields))
         except discord.NotFound:
+            self.deleted_messages.add(message_id)
+            self.sent_content.forget(message_id)
+            metrics.incr("message_edit_not_found")
+            return False
+        except Exception:
+            if self.sent_content.unchanged(message_id, digest):
+                self.sent_content.forget(message_id)
+            raise
+        return True
+
+    def refresh_task_later(self, guild: discord.Guild, task_id: int):
+        """
+        Refreshes the task's message in the background. Each attempt reads
+        the task again, so a retry never puts back an older state.
+        """
+        async def refresh():
+            seq = storage.task_write_seq(guild.id)
+            task = await storage.get_task(guild.id, task_id)
+            if task:
+                await self.refresh_task_message(guild, task, seq)
+        jobs.spawn(f"refresh task {guild.id}/{task_id}", refresh)
+
+    async def refresh_task_message(self, guild: discord.Guild, task: Task, seq: Optional[int] = None):
+        """`seq` is storage.task_write_seq() read before `task` was loaded."""
+        channel = guild.get_channel(task.channel_id)
+        message_id = task.message_id
+        if not channel or not isinstance(channel, discord.TextChannel) or not message_id:
             return
 
-        assignee_id = task.get("assignee_id")
-        assignee_text = f"<@{assignee_id}>" if assignee_id else "Unassigned"
+        embed = task_render.task_embed(guild.id, task, seq)
+        view = TaskMainView(task.id)
+        await self.edit_message(channel, message_id, embed=embed, view=view)
 
-        embed = discord.Embed(
-            title=f"[Task #{task['id']}] {task['title']}",
-            description=task["description"],
-            color=discord.Color.orange()
-        )
-        embed.add_field(name="Priority", value=task["priority"], inline=True)
-        embed.add_field(name="Status", value=task["status"], inline=True)
-        embed.add_field(name="Assignee", value=assignee_text, inline=True)
-        embed.set_footer(text=f"Creator ID: {task['creator_id']}")
-
-        view = TaskMainView(self, task["id"])
-        await msg.edit(embed=embed, view=view)
-
-    async def ensure_task_thread(self, interaction: discord.Interaction, task: dict) -> Optional[discord.Thread]:
+    async def ensure_task_thread(self, interaction: discord.Interaction, task: Task) -> Optional[discord.Thread]:
         guild = interaction.guild
         if not guild:
             return None
-        channel = guild.get_channel(task.get("channel_id"))
+        channel = guild.get_channel(task.channel_id)
         if not channel or not isinstance(channel, discord.TextChannel):
-            await interaction.response.send_message("Task channel not found.", ephemeral=True)
+            await interaction.followup.send("Task channel not found.", ephemeral=True)
             return None
 
-        thread_id = task.get("thread_id")
+        thread_id = task.thread_id
         thread: Optional[discord.Thread] = None
 
         if thread_id:
             thread = guild.get_thread(thread_id)
 
         if not thread:
-            try:
-                msg = await channel.fetch_message(task["message_id"])
-            except discord.NotFound:
-                await interaction.response.send_message("Cannot locate task message to create a thread.", ephemeral=True)
+            message_id = task.message_id
+            if message_id and message_id not in self.deleted_messages:
+                try:
+                    message = channel.get_partial_message(message_id)
+                    thread = await outbound.run(
+                        Priority.TASK_EDIT,
+                        channel_route(channel.id),
+                        lambda: message.create_thread(
+                            name=f"Task #{task.id} - {task.title[:50]}",
+                            auto_archive_duration=1440
+                        )
+                    )
+                except discord.NotFound:
+                    self.deleted_messages.add(message_id)
+            if not thread:
+                await interaction.followup.send("Cannot locate task message to create a thread.", ephemeral=True)
                 return None
 
-            thread = await msg.create_thread(
-                name=f"Task #{task['id']} - {task['title'][:50]}",
-                auto_archive_duration=1440
-            )
-            update_task(guild.id, task["id"], thread_id=thread.id)
-
-            await thread.send(
-                content=f"Thread for **Task #{task['id']}**.\n"
-                        f"Use this thread to post updates, images, and final work.",
-                view=TaskThreadView(self, task["id"])
+            await storage.update_task(guild.id, task.id, thread_id=thread.id)
+
+            jobs.spawn(
+                f"thread intro {guild.id}/{task.id}",
+                lambda: outbound.run(
+                    Priority.TASK_EDIT,
+                    channel_route(thread.id),
+                    lambda: thread.send(
+                        content=f"Thread for **Task #{task.id}**.\n"
+                                f"Use this thread to post updates, images, and final work.",
+                        view=TaskThreadView(task.id)
+                    )
+                ),
+                idempotent=False
             )
 
         return thread
@@ -497,7 +780,7 @@ class TasksCog(commands.Cog):
                 ephemeral=True
             )
 
-        task = get_task(guild.id, task_id)
+        task = await storage.get_task(guild.id, task_id)
         if not task:
             return await interaction.response.send_message("Task not found.", ephemeral=True)
 
@@ -518,24 +801,27 @@ class TasksCog(commands.Cog):
         if not guild:
             return await interaction.response.send_message("Server only.", ephemeral=True)
 
-        task = get_task(guild.id, task_id)
+        # Under the guild lock, so it can't land between another handler's
+        # assignee check and its write.
+        async with storage.guild_txn(guild.id) as txn:
+            task = await txn.update_task(task_id, assignee_id=member.id)
         if not task:
             return await interaction.response.send_message("Task not found.", ephemeral=True)
 
-        update_task(guild.id, task_id, assignee_id=member.id)
-        task = get_task(guild.id, task_id)
-        await self.refresh_task_message(guild, task)
-
-        await self.log_action(
-            guild,
-            f"Task #{task_id} assigned",
-            f"Assigned to {member.mention} by {interaction.user.mention}"
-        )
         await interaction.response.edit_message(
             content=f"Task #{task_id} assigned to {member.mention}.",
             view=None
         )
+        record_ack(interaction)
 
+        self.refresh_task_later(guild, task_id)
+        cfg = await storage.get_config_snapshot(guild.id)
+        await self.log_action(
+            guild,
+            f"Task #{task_id} assigned",
+            f"Assigned to {member.mention} by {interaction.user.mention}",
+            cfg=cfg
+        )
         await self.update_task_board(guild)
 
     async def handle_open_thread(self, interaction: discord.Interaction, task_id: int):
@@ -543,48 +829,65 @@ class TasksCog(commands.Cog):
         if not guild:
             return await interaction.response.send_message("Server only.", ephemeral=True)
 
-        task = get_task(guild.id, task_id)
+        task = await storage.get_task(guild.id, task_id)
         if not task:
             return await interaction.response.send_message("Task not found.", ephemeral=True)
 
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        record_ack(interaction)
+
         thread = await self.ensure_task_thread(interaction, task)
         if not thread:
             return
 
-        await interaction.response.send_message(
+        await interaction.followup.send(
             f"Task thread: {thread.mention}",
             ephemeral=True
         )
 
-    async def handle_status_change(self, interaction: discord.Interaction, task_id: int, new_status: str):
+    async def handle_status_change(self, interaction: discord.Interaction, task_id: int, new_status: TaskStatus):
         guild = interaction.guild
         if not guild:
             return await interaction.response.send_message("Server only.", ephemeral=True)
 
-        task = get_task(guild.id, task_id)
-        if not task:
-            return await interaction.response.send_message("Task not found.", ephemeral=True)
-
-        assignee_id = task.get("assignee_id")
-        # Only assignee or managers can change status
-        if assignee_id and assignee_id != interaction.user.id and not interaction.user.guild_permissions.manage_messages:
-            return await interaction.response.send_message(
-                "Only the assigned developer or a manager can change the task status.",
-                ephemeral=True
-            )
-
-        update_task(guild.id, task_id, status=new_status)
-        task = get_task(guild.id, task_id)
-        await self.refresh_task_message(guild, task)
+        # Ack first: the guild lock below may be held by another handler.
+        await interaction.response.defer(ephemeral=True)
+        record_ack(interaction)
+
+        # Check and update under the guild lock so a concurrent reassignment
+        # can't slip in between the permission check and the write. Replies
+        # go out after the lock is released.
+        error: Optional[str] = None
+        async with storage.guild_txn(guild.id) as txn:
+            task = await txn.get_task(task_id)
+            # Only assignee or managers can change status
+            if not task:
+                error = "Task not found."
+            elif (
+                task.assignee_id
+                and task.assignee_id != interaction.user.id
+                and not interaction.user.guild_permissions.manage_messages
+            ):
+                error = "Only the assigned developer or a manager can change the task status."
+            else:
+                task = await txn.update_task(task_id, status=new_status)
+        if error:
+            return await interaction.followup.send(error, ephemeral=True)
+        await interaction.followup.send(f"Status updated to {new_status}.", ephemeral=True)
+
+        self.refresh_task_later(guild, task_id)
+        cfg = await storage.get_config_snapshot(guild.id)
         await self.log_action(
             guild,
             f"Task #{task_id} status updated",
-            f"New status: **{new_status}** by {interaction.user.mention}"
+            f"New status: **{new_status}** by {interaction.user.mention}",
+            cfg=cfg
         )
-        await interaction.response.send_message(f"Status updated to {new_status}.", ephemeral=True)
-
         await self.update_task_board(guild)
 
+    async def handle_mark_in_progress(self, interaction: discord.Interaction, task_id: int):
+        await self.handle_status_change(interaction, task_id, TaskStatus.IN_PROGRESS)
+
     async def handle_submit_work(self, interaction: discord.Interaction, task_id: int):
         modal = SubmitWorkModal(self, task_id)
         await interaction.response.send_modal(modal)
@@ -600,49 +903,69 @@ class TasksCog(commands.Cog):
         msg_content = "Work submission notes:"
         if notes:
             msg_content += f"\n{notes}"
-        await thread.send(content=msg_content)
-
         await interaction.response.send_message(
             "Submission notes recorded. Attach your images/files in this thread as messages.",
             ephemeral=True
         )
+        record_ack(interaction)
+
+        jobs.spawn(
+            f"submission notes {thread.id}",
+            lambda: outbound.run(Priority.TASK_EDIT, channel_route(thread.id), lambda: thread.send(content=msg_content)),
+            idempotent=False
+        )
 
     async def handle_mark_done(self, interaction: discord.Interaction, task_id: int):
         guild = interaction.guild
         if not guild:
             return await interaction.response.send_message("Server only.", ephemeral=True)
 
-        task = get_task(guild.id, task_id)
-        if not task:
-            return await interaction.response.send_message("Task not found.", ephemeral=True)
-
-        assignee_id = task.get("assignee_id")
-        if assignee_id and assignee_id != interaction.user.id and not interaction.user.guild_permissions.manage_messages:
-            return await interaction.response.send_message(
-                "Only the assigned developer or a manager can mark this task as done.",
-                ephemeral=True
-            )
-
-        update_task(guild.id, task_id, status="Completed")
-        task = get_task(guild.id, task_id)
-        await self.refresh_task_message(guild, task)
+        await interaction.response.defer(ephemeral=True)
+        record_ack(interaction)
+
+        error: Optional[str] = None
+        async with storage.guild_txn(guild.id) as txn:
+            task = await txn.get_task(task_id)
+            if not task:
+                error = "Task not found."
+            elif (
+                task.assignee_id
+                and task.assignee_id != interaction.user.id
+                and not interaction.user.guild_permissions.manage_messages
+            ):
+                error = "Only the assigned developer or a manager can mark this task as done."
+            else:
+                # Status and completion time land as a single journal record.
+                task = await txn.update_task(task_id, status=TaskStatus.COMPLETED, completed_at=int(time.time()))
+        if error:
+            return await interaction.followup.send(error, ephemeral=True)
+        await interaction.followup.send("Task marked as completed and logged.", ephemeral=True)
+        assignee_id = task.assignee_id
+
+        self.refresh_task_later(guild, task_id)
 
         # Attempt to archive thread
-        thread_id = task.get("thread_id")
+        thread_id = task.thread_id
         if thread_id:
             thread = guild.get_thread(thread_id)
             if thread:
-                await thread.edit(archived=True, locked=True)
+                jobs.spawn(
+                    f"archive thread {thread.id}",
+                    lambda: outbound.run(
+                        Priority.TASK_EDIT,
+                        channel_route(thread.id),
+                        lambda: thread.edit(archived=True, locked=True)
+                    )
+                )
 
         assignee_text = f"<@{assignee_id}>" if assignee_id else "Unassigned"
+        cfg = await storage.get_config_snapshot(guild.id)
         await self.log_action(
             guild,
             f"Task #{task_id} completed",
-            f"**Title:** {task['title']}\n**Assignee:** {assignee_text}\nMarked done by {interaction.user.mention}"
+            f"**Title:** {task.title}\n**Assignee:** {assignee_text}\nMarked done by {interaction.user.mention}",
+            cfg=cfg
         )
-
-        await interaction.response.send_message("Task marked as completed and logged.", ephemeral=True)
-
         await self.update_task_board(guild)
 
 
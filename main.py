@@ -1,12 +1,15 @@
 # main.py
 import os
-import asyncio
+from typing import Optional
+
 from dotenv import load_dotenv
 
 import discord
 from discord.ext import commands
 from aiohttp import web
 
+from utils import metrics
+
 load_dotenv()
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
 
@@ -19,15 +22,40 @@ intents.guilds = True
 class DevBot(commands.Bot):
     def __init__(self):
         super().__init__(command_prefix="!", intents=intents)
+        self.web_runner: Optional[web.AppRunner] = None
 
     async def setup_hook(self):
+        # On the bot's own loop, so the site stays up as long as the bot does.
+        self.web_runner = await start_web_app()
         await self.load_extension("cogs.config_cog")
         await self.load_extension("cogs.tasks")
         await self.load_extension("cogs.devpanel")
         await self.load_extension("cogs.ai_helper")
+        # Task and /tasks page buttons encode their state in the custom_id;
+        # one registration serves every message, including ones sent before
+        # a restart. LegacyTaskButton handles (and upgrades) task messages
+        # from before that.
+        from cogs.tasks import LegacyTaskButton, TaskButton, TaskListButton, TaskPanelView
+        self.add_dynamic_items(TaskButton, TaskListButton, LegacyTaskButton)
+        self.add_view(TaskPanelView(self.get_cog("TasksCog")))
         await self.tree.sync()
         print("Slash commands synced.")
 
+    async def close(self):
+        # Finish background jobs and buffered logs while the HTTP session is open.
+        from utils.jobs import jobs
+        from utils.log_sink import log_sink
+        from utils.outbound import outbound
+        await jobs.close()
+        await log_sink.close()
+        await outbound.close()
+        await super().close()
+        if self.web_runner is not None:
+            await self.web_runner.cleanup()
+        # Persist anything still waiting on the debounce timer.
+        from utils import storage
+        storage.flush()
+
 
 bot = DevBot()
 
@@ -43,9 +71,13 @@ async def handle_root(request):
     return web.Response(text="Discord bot is running.", content_type="text/plain")
 
 
-async def start_web_app():
+async def handle_metrics(request):
+    return web.Response(text=metrics.render_text(), content_type="text/plain")
+
+
+async def start_web_app() -> web.AppRunner:
     app = web.Application()
-    app.add_routes([web.get("/", handle_root)])
+    app.add_routes([web.get("/", handle_root), web.get("/metrics", handle_metrics)])
 
     runner = web.AppRunner(app)
     await runner.setup()
@@ -54,31 +86,14 @@ async def start_web_app():
     site = web.TCPSite(runner, "0.0.0.0", port)
     await site.start()
     print(f"Web server started on port {port}")
-
-
-async def start_everything():
-    # Start web server without blocking the bot
-    asyncio.create_task(start_web_app())
-    # Now let discord.py manage reconnection with bot.run
-    # We don't call bot.run here because it's blocking and not awaitable; instead,
-    # we start this coroutine from main() before bot.run.
-    # This function just ensures web app is started early.
+    return runner
 
 
 def main():
     if not DISCORD_TOKEN:
         raise RuntimeError("DISCORD_TOKEN missing from environment or .env")
 
-    # Start the web app in a background event loop and then run the bot using bot.run
-    async def runner():
-        await start_everything()
-
-    # Create a loop, start web app, then run bot using that loop
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    loop.run_until_complete(runner())
-
-    # bot.run creates and manages its own internal loop; we call it after web app is running
+    # bot.run owns the event loop; the web app is started from setup_hook.
     bot.run(DISCORD_TOKEN)
 
 
@@ -0,0 +1,120 @@
+"""
+Cache of AI answers, keyed by mode, model and the prompt with whitespace
+collapsed and case folded, so re-asking the same question is answered
+without a Gemini call.
+
+Two tiers: an in-memory LRU of AI_CACHE_SIZE answers and a SQLite file
+under data/ that survives restarts. Entries in both expire after
+AI_CACHE_TTL seconds. Disk work runs on a dedicated thread so it never
+blocks the event loop. Counters ai_cache_hits_memory, ai_cache_hits_disk
+and ai_cache_misses go to utils.metrics.
+"""
+import asyncio
+import functools
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from utils import metrics
+from utils.storage import DATA_DIR
+
+AI_CACHE_FILE = os.path.join(DATA_DIR, "ai_cache.sqlite3")
+AI_CACHE_SIZE = int(os.getenv("AI_CACHE_SIZE", "512"))
+AI_CACHE_TTL = float(os.getenv("AI_CACHE_TTL", str(24 * 3600)))
+
+# Expired rows are pruned from disk once per this many writes.
+_PRUNE_EVERY = 100
+
+
+def normalize_prompt(prompt: str) -> str:
+    return " ".join(prompt.split()).casefold()
+
+
+def cache_key(mode: str, model: str, prompt: str) -> str:
+    raw = "\0".join((mode, model, normalize_prompt(prompt)))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class AICache:
+    def __init__(self, path: str = AI_CACHE_FILE, maxsize: int = AI_CACHE_SIZE, ttl: float = AI_CACHE_TTL):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai-cache")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args))
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers (key TEXT PRIMARY KEY, created REAL NOT NULL, text TEXT NOT NULL)"
+            )
+            self._prune()
+        return self._conn
+
+    def _prune(self) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM answers WHERE created < ?", (time.time() - self.ttl,))
+
+    def _disk_get(self, key: str) -> Optional[Tuple[float, str]]:
+        with self._lock:
+            row = self._db().execute("SELECT created, text FROM answers WHERE key = ?", (key,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def _disk_put(self, key: str, created: float, text: str) -> None:
+        with self._lock:
+            conn = self._db()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO answers VALUES (?, ?, ?)", (key, created, text))
+            self._writes += 1
+            if self._writes % _PRUNE_EVERY == 0:
+                self._prune()
+
+    def _remember(self, key: str, created: float, text: str) -> None:
+        self._memory[key] = (created, text)
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            if now - entry[0] < self.ttl:
+                self._memory.move_to_end(key)
+                metrics.incr("ai_cache_hits_memory")
+                return entry[1]
+            del self._memory[key]
+        entry = await self._run(self._disk_get, key)
+        if entry is not None and now - entry[0] < self.ttl:
+            self._remember(key, *entry)
+            metrics.incr("ai_cache_hits_disk")
+            return entry[1]
+        metrics.incr("ai_cache_misses")
+        return None
+
+    async def put(self, key: str, text: str) -> None:
+        created = time.time()
+        self._remember(key, created, text)
+        await self._run(self._disk_put, key, created, text)
+
+    async def close(self) -> None:
+        def close_db():
+            with self._lock:
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+        await self._run(close_db)
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,195 @@
+"""
+Admission and fair ordering for Gemini calls.
+
+At most AI_MAX_CONCURRENT calls run at once across all guilds. Waiting
+requests are queued per guild and started round-robin, one guild at a
+time, so a busy guild can't starve the rest. Each guild also has a token
+bucket - AI_GUILD_BURST calls at once, refilled at AI_GUILD_RATE per
+minute - that caps its share of the API quota even when nothing else is
+queued. When AI_QUEUE_LIMIT requests are waiting in total, or
+AI_GUILD_QUEUE_LIMIT for one guild, new ones are refused immediately
+with QueueFull rather than left to time out.
+
+    ticket = ai_scheduler.enqueue(guild_id)   # may raise QueueFull
+    ticket.position                           # 1-based; 0 once started
+    async with ticket:                        # waits for a slot
+        ...
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional, Tuple
+
+from utils import metrics
+
+AI_MAX_CONCURRENT = int(os.getenv("AI_MAX_CONCURRENT", "4"))
+AI_QUEUE_LIMIT = int(os.getenv("AI_QUEUE_LIMIT", "50"))
+AI_GUILD_QUEUE_LIMIT = int(os.getenv("AI_GUILD_QUEUE_LIMIT", "10"))
+AI_GUILD_RATE = float(os.getenv("AI_GUILD_RATE", "6"))
+AI_GUILD_BURST = float(os.getenv("AI_GUILD_BURST", "3"))
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Ticket:
+    """One request's place in the AI queue."""
+
+    def __init__(self, scheduler: "AIScheduler", guild_id: int):
+        self.scheduler = scheduler
+        self.guild_id = guild_id
+        self.queued_at = time.monotonic()
+        self._granted: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._released = False
+
+    @property
+    def position(self) -> int:
+        if self._granted.done():
+            return 0
+        return self.scheduler._position(self)
+
+    async def wait(self) -> None:
+        try:
+            await asyncio.shield(self._granted)
+        except asyncio.CancelledError:
+            self.cancel()
+            raise
+
+    def release(self) -> None:
+        if self._granted.done() and not self._released:
+            self._released = True
+            self.scheduler._finished()
+
+    def cancel(self) -> None:
+        """Leave the queue, or give the slot back if already started."""
+        if self._granted.done():
+            self.release()
+        else:
+            self.scheduler._remove(self)
+            self._granted.cancel()
+
+    async def __aenter__(self) -> "Ticket":
+        await self.wait()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.release()
+
+
+class AIScheduler:
+    def __init__(
+        self,
+        max_concurrent: int = AI_MAX_CONCURRENT,
+        queue_limit: int = AI_QUEUE_LIMIT,
+        guild_queue_limit: int = AI_GUILD_QUEUE_LIMIT,
+        rate_per_minute: float = AI_GUILD_RATE,
+        burst: float = AI_GUILD_BURST,
+    ):
+        self.max_concurrent = max_concurrent
+        self.queue_limit = queue_limit
+        self.guild_queue_limit = guild_queue_limit
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        # Guilds with waiting requests, in round-robin order.
+        self._queues: "OrderedDict[int, Deque[Ticket]]" = OrderedDict()
+        # guild_id -> (tokens, time they were counted)
+        self._buckets: Dict[int, Tuple[float, float]] = {}
+        self._queued = 0
+        self._running = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def enqueue(self, guild_id: int) -> Ticket:
+        queue = self._queues.get(guild_id)
+        if self._queued >= self.queue_limit or (queue is not None and len(queue) >= self.guild_queue_limit):
+            metrics.incr("ai_queue_rejected")
+            raise QueueFull()
+        ticket = Ticket(self, guild_id)
+        if queue is None:
+            queue = self._queues[guild_id] = deque()
+        queue.append(ticket)
+        self._queued += 1
+        metrics.incr("ai_queue_enqueued")
+        self._pump()
+        return ticket
+
+    def _tokens(self, guild_id: int, now: float) -> float:
+        tokens, counted_at = self._buckets.get(guild_id, (self.burst, now))
+        return min(self.burst, tokens + (now - counted_at) * self.rate)
+
+    def _pump(self) -> None:
+        now = time.monotonic()
+        while self._running < self.max_concurrent and self._queues:
+            for guild_id in self._queues:
+                tokens = self._tokens(guild_id, now)
+                if tokens >= 1:
+                    self._buckets[guild_id] = (tokens - 1, now)
+                    break
+            else:
+                self._wake_for_tokens(now)
+                return
+            # Pop the guild and re-add it at the back: round-robin.
+            queue = self._queues.pop(guild_id)
+            ticket = queue.popleft()
+            if queue:
+                self._queues[guild_id] = queue
+            self._queued -= 1
+            self._running += 1
+            metrics.observe("ai_queue_wait_seconds", now - ticket.queued_at)
+            ticket._granted.set_result(None)
+
+    def _wake_for_tokens(self, now: float) -> None:
+        if self._timer is not None or not self.rate:
+            return
+        wait = min((1 - self._tokens(g, now)) / self.rate for g in self._queues)
+
+        def wake():
+            self._timer = None
+            self._pump()
+
+        self._timer = asyncio.get_running_loop().call_later(max(wait, 0.01), wake)
+
+    def _position(self, ticket: Ticket) -> int:
+        # Round-robin: before this ticket's turn, each other guild gets one
+        # turn per ticket ahead of it in its own queue, plus one more if
+        # that guild comes earlier in the rotation.
+        queue = self._queues.get(ticket.guild_id)
+        if not queue or ticket not in queue:
+            return 0
+        ahead = queue.index(ticket)
+        position = ahead + 1
+        turns = ahead + 1
+        for guild_id, other in self._queues.items():
+            if guild_id == ticket.guild_id:
+                turns = ahead
+            else:
+                position += min(len(other), turns)
+        return position
+
+    def _remove(self, ticket: Ticket) -> None:
+        queue = self._queues.get(ticket.guild_id)
+        if queue and ticket in queue:
+            queue.remove(ticket)
+            self._queued -= 1
+            if not queue:
+                del self._queues[ticket.guild_id]
+
+    def _finished(self) -> None:
+        self._running -= 1
+        self._pump()
+
+    def pending(self) -> int:
+        return self._queued
+
+    def close(self) -> None:
+        """Drops everything still waiting; running calls finish normally."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for queue in list(self._queues.values()):
+            for ticket in list(queue):
+                ticket.cancel()
+
+
+ai_scheduler = AIScheduler()
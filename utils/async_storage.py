@@ -0,0 +1,228 @@
+"""
+Async facade over utils.storage for use inside interaction handlers.
+
+Every call runs on a small dedicated thread pool so file or database work
+never blocks the event loop that also services gateway heartbeats.
+"""
+import asyncio
+import contextlib
+import copy
+import functools
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+from utils import storage
+from utils.models import ConfigSnapshot, Task
+from utils.storage import (  # noqa: F401
+    TASK_STATUSES, OPEN_STATUSES, build_task, normalize_status, task_version, task_write_seq
+)
+
+# Upper bound on storage calls running at once; extra calls queue up.
+STORAGE_WORKERS = int(os.getenv("STORAGE_WORKERS", "4"))
+
+_executor = ThreadPoolExecutor(max_workers=STORAGE_WORKERS, thread_name_prefix="storage")
+
+_config_snapshots: Dict[int, ConfigSnapshot] = {}
+
+
+async def _run(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+
+
+async def flush() -> None:
+    await _run(storage.flush)
+
+
+# ---- Server config (per guild) ----
+
+async def get_server_config(guild_id: int) -> Dict[str, Any]:
+    """A private, mutable copy; use get_config_snapshot for read-only access."""
+    return await _run(storage.get_server_config, guild_id)
+
+
+async def get_config_snapshot(guild_id: int) -> ConfigSnapshot:
+    """
+    Read-only config for one interaction. Served from memory until the next
+    config write bumps the guild's version; take it once per handler and
+    pass it along.
+    """
+    version = storage.config_version(guild_id)
+    snap = _config_snapshots.get(guild_id)
+    if snap is not None and snap.version == version:
+        return snap
+    snap = ConfigSnapshot(guild_id, version, await _run(storage.get_server_config, guild_id))
+    # A write that finished while we were reading may not be in `snap`.
+    if storage.config_version(guild_id) == version:
+        _config_snapshots[guild_id] = snap
+    return snap
+
+
+async def set_server_config(guild_id: int, new_config: Dict[str, Any]) -> None:
+    await _run(storage.set_server_config, guild_id, new_config)
+
+
+async def update_server_config(guild_id: int, **kwargs) -> Dict[str, Any]:
+    return await _run(storage.update_server_config, guild_id, **kwargs)
+
+
+# ---- Task storage ----
+
+async def create_task(
+    guild_id: int,
+    creator_id: int,
+    title: str,
+    description: str,
+    priority: str,
+    message_id: Optional[int] = None,
+    channel_id: Optional[int] = None,
+    thread_id: Optional[int] = None,
+) -> Task:
+    return await _run(
+        storage.create_task,
+        guild_id,
+        creator_id,
+        title,
+        description,
+        priority,
+        message_id=message_id,
+        channel_id=channel_id,
+        thread_id=thread_id,
+    )
+
+
+async def update_task(guild_id: int, task_id: int, **kwargs) -> Optional[Task]:
+    return await _run(storage.update_task, guild_id, task_id, **kwargs)
+
+
+async def allocate_task_id(guild_id: int) -> int:
+    return await _run(storage.allocate_task_id, guild_id)
+
+
+async def get_task(guild_id: int, task_id: int) -> Optional[Task]:
+    return await _run(storage.get_task, guild_id, task_id)
+
+
+async def list_tasks(guild_id: int) -> Dict[str, Task]:
+    return await _run(storage.list_tasks, guild_id)
+
+
+async def query_tasks(
+    guild_id: int,
+    statuses: Optional[Iterable[str]] = None,
+    assignee_id: Optional[int] = None,
+    priorities: Optional[Iterable[str]] = None,
+    limit: Optional[int] = None,
+    include_archived: bool = True,
+    after_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+) -> List[Task]:
+    return await _run(
+        storage.query_tasks, guild_id, statuses, assignee_id, priorities, limit, include_archived, after_id, before_id
+    )
+
+
+async def count_tasks(
+    guild_id: int,
+    statuses: Optional[Iterable[str]] = None,
+    assignee_id: Optional[int] = None,
+    priorities: Optional[Iterable[str]] = None,
+) -> int:
+    return await _run(storage.count_tasks, guild_id, statuses, assignee_id, priorities)
+
+
+# ---- Transactions ----
+
+class GuildTxn:
+    """
+    Changes to one guild, buffered and committed as a single write when the
+    `guild_txn` block exits cleanly. Reads inside the block see the buffered
+    changes; an exception discards them (a reserved task ID is just skipped).
+    """
+
+    def __init__(self, guild_id: int):
+        self.guild_id = guild_id
+        self._tasks: Dict[int, Optional[Task]] = {}
+        self._created: Dict[int, Task] = {}
+        self._updates: Dict[int, Dict[str, Any]] = {}
+        self._config: Optional[Dict[str, Any]] = None
+        self._config_updates: Dict[str, Any] = {}
+
+    async def get_task(self, task_id: int) -> Optional[Task]:
+        if task_id not in self._tasks:
+            self._tasks[task_id] = await get_task(self.guild_id, task_id)
+        task = self._tasks[task_id]
+        return task.copy() if task else None
+
+    async def create_task(
+        self,
+        creator_id: int,
+        title: str,
+        description: str,
+        priority: str,
+        message_id: Optional[int] = None,
+        channel_id: Optional[int] = None,
+        thread_id: Optional[int] = None,
+    ) -> Task:
+        task_id = await allocate_task_id(self.guild_id)
+        task = build_task(task_id, creator_id, title, description, priority, message_id, channel_id, thread_id)
+        return self.add_task(task)
+
+    def add_task(self, task: Task) -> Task:
+        """Store a task from build_task, with an ID from allocate_task_id."""
+        task = task.copy()
+        self._created[task.id] = task
+        self._tasks[task.id] = task
+        return task.copy()
+
+    async def update_task(self, task_id: int, **kwargs) -> Optional[Task]:
+        if await self.get_task(task_id) is None:
+            return None
+        task = self._tasks[task_id]
+        task.update(**kwargs)
+        if task_id not in self._created:
+            self._updates.setdefault(task_id, {}).update(kwargs)
+        return task.copy()
+
+    async def get_server_config(self) -> Dict[str, Any]:
+        if self._config is None:
+            self._config = copy.deepcopy(dict(await get_config_snapshot(self.guild_id)))
+        return copy.deepcopy(self._config)
+
+    async def update_server_config(self, **kwargs) -> Dict[str, Any]:
+        await self.get_server_config()
+        self._config.update(kwargs)
+        self._config_updates.update(kwargs)
+        return copy.deepcopy(self._config)
+
+    async def commit(self) -> None:
+        ops: List[tuple] = [("create", task) for task in self._created.values()]
+        ops.extend(("update", task_id, fields) for task_id, fields in self._updates.items())
+        if self._config_updates:
+            ops.append(("config", self._config_updates))
+        if ops:
+            await _run(storage.apply_ops, self.guild_id, ops)
+        self._created, self._updates, self._config_updates = {}, {}, {}
+
+
+_guild_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+@contextlib.asynccontextmanager
+async def guild_txn(guild_id: int) -> AsyncIterator[GuildTxn]:
+    """
+    Serialize work on one guild and commit it as one write:
+
+        async with storage.guild_txn(guild.id) as txn:
+            task = await txn.get_task(task_id)
+            await txn.update_task(task_id, status="Completed")
+    """
+    lock = _guild_locks.get(guild_id)
+    if lock is None:
+        lock = _guild_locks[guild_id] = asyncio.Lock()
+    async with lock:
+        txn = GuildTxn(guild_id)
+        yield txn
+        await txn.commit()
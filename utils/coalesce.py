@@ -0,0 +1,61 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Set
+
+from utils import metrics
+
+log = logging.getLogger(__name__)
+
+
+class Coalescer:
+    """
+    Runs `fn(key)` for each key at most once per `window` seconds.
+
+    The first request after a quiet period runs right away. Requests that
+    arrive while a run is waiting are folded into it. Requests that arrive
+    while `fn` is running queue exactly one more run, so the latest state
+    always lands. Counters `<name>_requests`, `<name>_runs` and
+    `<name>_coalesced` (runs saved) go to utils.metrics.
+    """
+
+    def __init__(self, fn: Callable[[Any], Awaitable[None]], window: float, name: str):
+        self.fn = fn
+        self.window = window
+        self.name = name
+        self._dirty: Set[Hashable] = set()
+        self._workers: Dict[Hashable, asyncio.Task] = {}
+        self._last_run: Dict[Hashable, float] = {}
+
+    def request(self, key: Hashable) -> None:
+        metrics.incr(f"{self.name}_requests")
+        if key in self._dirty:
+            metrics.incr(f"{self.name}_coalesced")
+            return
+        self._dirty.add(key)
+        if key not in self._workers:
+            self._workers[key] = asyncio.create_task(self._worker(key))
+
+    async def _worker(self, key: Hashable) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while key in self._dirty:
+                wait = self._last_run.get(key, float("-inf")) + self.window - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._dirty.discard(key)
+                self._last_run[key] = loop.time()
+                metrics.incr(f"{self.name}_runs")
+                try:
+                    await self.fn(key)
+                except Exception:
+                    log.exception("%s refresh for %r failed", self.name, key)
+        finally:
+            self._workers.pop(key, None)
+
+    async def close(self) -> None:
+        """Cancel waiting and running refreshes."""
+        workers = list(self._workers.values())
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._dirty.clear()
@@ -0,0 +1,118 @@
+"""
+Client for the Gemini generateContent API.
+
+A GeminiClient owns one aiohttp session for its whole life, so requests
+reuse pooled keep-alive connections instead of paying a TCP and TLS
+handshake each time. Call start() before use and close() when done;
+AIHelperCog does this in cog_load / cog_unload.
+
+GEMINI_API_BASE overrides the API root, e.g. to point the bot at
+benchmarks/gemini_stub.py.
+"""
+import json
+import os
+from typing import Any, AsyncIterator, Dict, Optional
+
+import aiohttp
+
+GEMINI_API_BASE = os.getenv("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta").rstrip("/")
+GEMINI_MODEL = "gemini-1.5-flash"  # valid model name for v1beta
+
+# Connection pool and timeouts for calls to the API.
+AI_HTTP_CONNECTIONS = int(os.getenv("AI_HTTP_CONNECTIONS", "16"))
+AI_HTTP_KEEPALIVE = float(os.getenv("AI_HTTP_KEEPALIVE", "60"))
+AI_HTTP_CONNECT_TIMEOUT = float(os.getenv("AI_HTTP_CONNECT_TIMEOUT", "10"))
+AI_HTTP_TIMEOUT = float(os.getenv("AI_HTTP_TIMEOUT", "60"))
+# Streams have no overall limit, since long answers take as long as they
+# take; they fail only if no data arrives for this many seconds.
+AI_STREAM_READ_TIMEOUT = float(os.getenv("AI_STREAM_READ_TIMEOUT", "30"))
+
+
+def build_payload(prompt: str) -> Dict[str, Any]:
+    return {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+
+
+def response_text(data: Dict[str, Any]) -> Optional[str]:
+    """
+    The first candidate's text from a generateContent response, or None if
+    there is none (e.g. the prompt was blocked).
+    """
+    candidates = data.get("candidates", [])
+    if not candidates:
+        return None
+
+    parts = candidates[0].get("content", {}).get("parts", [])
+    if not parts:
+        return None
+
+    return parts[0].get("text") or None
+
+
+def _chunk_text(data: Dict[str, Any]) -> str:
+    candidates = data.get("candidates") or [{}]
+    parts = candidates[0].get("content", {}).get("parts") or [{}]
+    return "".join(part.get("text", "") for part in parts)
+
+
+class GeminiClient:
+    def __init__(self, api_key: Optional[str], model: str = GEMINI_MODEL, base_url: str = GEMINI_API_BASE):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def start(self) -> None:
+        if self._session is not None:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=AI_HTTP_CONNECTIONS,
+            ttl_dns_cache=300,
+            keepalive_timeout=AI_HTTP_KEEPALIVE,
+        )
+        timeout = aiohttp.ClientTimeout(total=AI_HTTP_TIMEOUT, sock_connect=AI_HTTP_CONNECT_TIMEOUT)
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            headers={"x-goog-api-key": self.api_key or ""},
+        )
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _url(self, method: str) -> str:
+        return f"{self.base_url}/models/{self.model}:{method}"
+
+    async def generate(self, prompt: str) -> Optional[str]:
+        if self._session is None:
+            raise RuntimeError("GeminiClient.start() was not called")
+        async with self._session.post(self._url("generateContent"), json=build_payload(prompt)) as resp:
+            # Read once; decode as JSON only on success.
+            body = await resp.read()
+        if resp.status != 200:
+            raise RuntimeError(f"API error {resp.status}: {body.decode('utf-8', 'replace')}")
+        return response_text(json.loads(body))
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Yields the answer in pieces as streamGenerateContent produces them
+        (server-sent events, one JSON response chunk per `data:` line).
+        """
+        if self._session is None:
+            raise RuntimeError("GeminiClient.start() was not called")
+        url = self._url("streamGenerateContent")
+        timeout = aiohttp.ClientTimeout(
+            total=None, sock_connect=AI_HTTP_CONNECT_TIMEOUT, sock_read=AI_STREAM_READ_TIMEOUT
+        )
+        async with self._session.post(url, params={"alt": "sse"}, json=build_payload(prompt), timeout=timeout) as resp:
+            if resp.status != 200:
+                body = await resp.read()
+                raise RuntimeError(f"API error {resp.status}: {body.decode('utf-8', 'replace')}")
+            async for line in resp.content:
+                line = line.strip()
+                if not line.startswith(b"data:"):
+                    continue
+                text = _chunk_text(json.loads(line[5:]))
+                if text:
+                    yield text
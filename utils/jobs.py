@@ -0,0 +1,86 @@
+"""
+Side effects that run after an interaction has been acknowledged.
+
+Handlers reply (or defer) first, calling `record_ack` right after, and
+hand the slow Discord work - task message refreshes, thread edits, board
+refreshes - to `jobs.spawn`. A failed job is retried up to JOB_RETRIES
+times with exponential backoff. Client errors other than 429 (the message
+is gone, a permission is missing) are not retried; retrying can't fix
+them, and neither are plain bugs.
+
+Jobs that post a new message pass idempotent=False. After a timeout, a
+dropped connection or a 5xx, Discord may already have accepted the
+message, so those jobs are retried only on 429, which means it was
+refused.
+"""
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, Set
+
+import aiohttp
+import discord
+
+from utils import metrics
+
+log = logging.getLogger(__name__)
+
+JOB_RETRIES = int(os.getenv("JOB_RETRIES", "3"))
+JOB_RETRY_DELAY = float(os.getenv("JOB_RETRY_DELAY", "1.0"))
+
+
+def record_ack(interaction: discord.Interaction) -> None:
+    """Records time from interaction creation (by Discord's clock) to our ack."""
+    latency = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+    metrics.observe("interaction_ack_seconds", max(latency, 0.0))
+
+
+def _retryable(e: Exception, idempotent: bool) -> bool:
+    if isinstance(e, discord.HTTPException):
+        return e.status == 429 or (idempotent and e.status >= 500)
+    # The request may or may not have reached Discord.
+    return idempotent and isinstance(e, (asyncio.TimeoutError, aiohttp.ClientError, OSError))
+
+
+class JobRunner:
+    def __init__(self, retries: int = JOB_RETRIES, retry_delay: float = JOB_RETRY_DELAY):
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._tasks: Set[asyncio.Task] = set()
+
+    def spawn(self, name: str, fn: Callable[[], Awaitable[None]], idempotent: bool = True) -> asyncio.Task:
+        """Run `fn()` in the background. `fn` is called again on each retry."""
+        metrics.incr("jobs_started")
+        task = asyncio.create_task(self._run(name, fn, idempotent))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _run(self, name: str, fn: Callable[[], Awaitable[None]], idempotent: bool) -> None:
+        for attempt in range(self.retries + 1):
+            try:
+                await fn()
+                metrics.incr("jobs_succeeded")
+                return
+            except Exception as e:
+                if attempt == self.retries or not _retryable(e, idempotent):
+                    metrics.incr("jobs_failed")
+                    log.exception("Job %s failed after %d attempt(s)", name, attempt + 1)
+                    return
+                metrics.incr("jobs_retried")
+                log.warning("Job %s failed (%s); retrying", name, e)
+                await asyncio.sleep(self.retry_delay * 2 ** attempt)
+
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """Wait up to `timeout` seconds for running jobs, then cancel the rest."""
+        tasks = list(self._tasks)
+        if tasks:
+            done, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+
+
+jobs = JobRunner()
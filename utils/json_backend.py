@@ -0,0 +1,765 @@
+import copy
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Set, Tuple
+
+from utils import snapshot
+from utils.models import Task, TaskPriority, TaskStatus, encode_fields
+from utils.task_index import TaskIndex
+
+log = logging.getLogger(__name__)
+
+FSYNC_POLICIES = ("always", "interval", "never")
+# Snapshot file extension per format; journals are JSON lines either way.
+SNAPSHOT_FORMATS = {"json": ".json", "binary": ".snap"}
+
+
+def _move_aside(path: str) -> None:
+    # Never silently start over on top of a damaged file: keep it aside.
+    aside = f"{path}.corrupt-{int(time.time())}"
+    os.replace(path, aside)
+    log.error("Could not parse %s; moved it to %s and started empty.", path, aside)
+
+
+def _load_json(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except json.JSONDecodeError:
+        _move_aside(path)
+        return {}
+
+
+def _dump_json(data: Dict[str, Any]) -> str:
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+def _save_bytes(path: str, data: bytes) -> None:
+    # Write-then-rename so a crash leaves either the old or the new file.
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _save_json(path: str, text: str) -> None:
+    _save_bytes(path, text.encode("utf-8"))
+
+
+def _remove_if_exists(path: str) -> None:
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def _encode_record(record: Dict[str, Any]) -> bytes:
+    return (json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n").encode("utf-8")
+
+
+ArchiveCounts = Dict[Tuple[Optional[int], TaskPriority], int]
+
+
+def _decode_archived(rows: Optional[List[List[Any]]]) -> ArchiveCounts:
+    return {(assignee_id, TaskPriority(priority)): n for assignee_id, priority, n in rows or ()}
+
+
+class _GuildTasks:
+    """
+    One guild's tasks as Task objects, with their indexes. `archived`
+    counts the guild's tasks in the archive tier by (assignee_id, priority);
+    they are all Completed.
+    """
+
+    def __init__(
+        self,
+        counter: int = 0,
+        tasks: Optional[Dict[int, Task]] = None,
+        archived: Optional[ArchiveCounts] = None,
+    ):
+        self.counter = counter
+        self.tasks: Dict[int, Task] = tasks or {}
+        self.index = TaskIndex(self.tasks.values())
+        self.archived: ArchiveCounts = archived or {}
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "_GuildTasks":
+        tasks = {}
+        for raw in data.get("tasks", {}).values():
+            task = Task.from_dict(raw)
+            tasks[task.id] = task
+        return cls(data.get("counter", 0), tasks, _decode_archived(data.get("archived")))
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "counter": self.counter,
+            "tasks": {str(task_id): task.to_dict() for task_id, task in self.tasks.items()},
+        }
+
+    def info(self) -> Dict[str, Any]:
+        """Guild-level data stored alongside the tasks in a snapshot."""
+        if not self.archived:
+            return {}
+        return {"archived": [[a, p.value, n] for (a, p), n in self.archived.items() if n > 0]}
+
+    def counts(self) -> ArchiveCounts:
+        return dict(Counter((task.assignee_id, task.priority) for task in self.tasks.values()))
+
+    def archived_count(self, assignee_id: Optional[int], priorities: Optional[Iterable[TaskPriority]]) -> int:
+        if priorities is not None:
+            priorities = set(priorities)
+        return sum(
+            n for (a, p), n in self.archived.items()
+            if (assignee_id is None or a == assignee_id) and (priorities is None or p in priorities)
+        )
+
+    def remove(self, task_id: int) -> Optional[Task]:
+        task = self.tasks.pop(task_id, None)
+        if task is not None:
+            self.index.remove(task)
+        return task
+
+    def put(self, task: Task) -> None:
+        old = self.tasks.get(task.id)
+        if old is not None:
+            self.index.remove(old)
+        self.tasks[task.id] = task
+        self.index.add(task)
+        self.counter = max(self.counter, task.id)
+
+    def change(self, task: Task, fields: Dict[str, Any]) -> None:
+        self.index.remove(task)
+        task.update(**fields)
+        self.index.add(task)
+
+    def apply(self, record: Dict[str, Any]) -> None:
+        # Records are absolute writes, so replaying one that is already part
+        # of the snapshot is harmless. Compaction relies on that.
+        op = record.get("op")
+        if op == "batch":
+            for sub in record["ops"]:
+                self.apply(sub)
+        elif op == "counter":
+            self.counter = max(self.counter, record["value"])
+        elif op == "create":
+            self.put(Task.from_dict(record["task"]))
+        elif op == "update":
+            task = self.tasks.get(record["id"])
+            if task is not None:
+                self.change(task, record["fields"])
+        elif op == "unarchive":
+            # Brings an archived task back into the hot set before it changes.
+            task = Task.from_dict(record["task"])
+            if task.id not in self.tasks:
+                key = (task.assignee_id, task.priority)
+                self.archived[key] = max(0, self.archived.get(key, 0) - 1)
+            self.put(task)
+
+
+def _replay_journal(guild: _GuildTasks, path: str) -> int:
+    """Apply every complete record in `path`; returns the journal's valid size."""
+    if not os.path.exists(path):
+        return 0
+    good = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            guild.apply(record)
+            good += len(line)
+    if good < os.path.getsize(path):
+        # A crash mid-append leaves a partial last line; drop it.
+        log.warning("Discarding torn tail of %s after %d bytes.", path, good)
+        with open(path, "r+b") as f:
+            f.truncate(good)
+    return good
+
+
+def _load_snapshot(path: str) -> _GuildTasks:
+    if not os.path.exists(path):
+        return _GuildTasks()
+    if path.endswith(".snap"):
+        try:
+            counter, tasks, info = snapshot.read_tasks(path)
+        except snapshot.SnapshotError:
+            _move_aside(path)
+            return _GuildTasks()
+        return _GuildTasks(counter, tasks, _decode_archived(info.get("archived")))
+    return _GuildTasks.from_json(_load_json(path))
+
+
+def migrate_legacy_tasks(legacy_file: str, tasks_dir: str) -> int:
+    """
+    One-shot split of the old single tasks.json (the get_all_tasks layout)
+    into one file per guild. The old file is renamed to *.migrated so this
+    only ever runs once. Returns the number of guilds written.
+    """
+    if not os.path.exists(legacy_file):
+        return 0
+    os.makedirs(tasks_dir, exist_ok=True)
+    data = _load_json(legacy_file)
+    for key, guild_data in data.items():
+        _save_json(os.path.join(tasks_dir, f"{key}.json"), _dump_json(guild_data))
+    os.replace(legacy_file, legacy_file + ".migrated")
+    return len(data)
+
+
+class _Shard:
+    """A loaded guild: its tasks, their indexes and the open handle on its journal."""
+
+    def __init__(self, snapshot_path: str, journal_path: str, guild: _GuildTasks, journal_size: int):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.guild = guild
+        self.journal: BinaryIO = open(journal_path, "ab")
+        self.journal_size = journal_size
+        self.unsynced = False
+        self.last_used = time.monotonic()
+        # Archive tier, loaded on demand; never shares IDs with `guild`.
+        self.archive: Optional[_GuildTasks] = None
+        self.archive_used = 0.0
+        self.next_archive_check = 0.0
+
+    def close(self) -> None:
+        self.journal.close()
+
+
+class JsonBackend:
+    """
+    Keeps server_config.json and one tasks snapshot per guild, plus an
+    append-only journal of task changes next to each snapshot.
+
+    A guild is loaded (snapshot + journal replay) the first time it is
+    touched and dropped again after `idle_evict` seconds without use. Each
+    mutation appends one compact record to the guild's journal; once the
+    journal passes `compact_bytes` it is folded into a fresh snapshot in the
+    background. `fsync` is "always" (every record), "interval" (on the flush
+    timer, `flush_delay` seconds after the first unsynced record) or "never".
+
+    `snapshot_format` "binary" writes snapshots and the config file in the
+    utils.snapshot format (.snap) instead of indented JSON. Files in the
+    other format are still read and are replaced on their next write.
+
+    With `archive_after` > 0, tasks Completed longer ago than that many
+    seconds move to a per-guild archive file under tasks_dir/archive. The
+    archive is read only when a lookup or query needs completed tasks;
+    counts come from per-guild totals kept in the snapshot. Changing an
+    archived task moves it back into the loaded set.
+    """
+
+    def __init__(
+        self,
+        tasks_dir: str,
+        config_file: str,
+        flush_delay: float,
+        idle_evict: float,
+        compact_bytes: int,
+        fsync: str = "interval",
+        legacy_tasks_file: Optional[str] = None,
+        snapshot_format: str = "json",
+        archive_after: float = 0,
+    ):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+        if snapshot_format not in SNAPSHOT_FORMATS:
+            raise ValueError(f"snapshot_format must be one of {tuple(SNAPSHOT_FORMATS)}, got {snapshot_format!r}")
+        self.tasks_dir = tasks_dir
+        self.config_file = config_file
+        self.flush_delay = flush_delay
+        self.idle_evict = idle_evict
+        self.compact_bytes = compact_bytes
+        self.fsync = fsync
+        self.snapshot_format = snapshot_format
+        self.archive_after = archive_after
+        self.archive_dir = os.path.join(tasks_dir, "archive")
+        self._ext = SNAPSHOT_FORMATS[snapshot_format]
+        self._stale_ext = next(ext for ext in SNAPSHOT_FORMATS.values() if ext != self._ext)
+        config_base = os.path.splitext(config_file)[0]
+        self._config_path = config_base + self._ext
+        self._stale_config_path = config_base + self._stale_ext
+
+        if legacy_tasks_file:
+            migrate_legacy_tasks(legacy_tasks_file, tasks_dir)
+        os.makedirs(tasks_dir, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._configs: Dict[str, Any] = {}
+        self._config_reader: Optional[snapshot.SnapshotReader] = None
+        self._config_dirty = False
+        self._open_configs()
+        self._shards: Dict[str, _Shard] = {}
+        self._busy_shards: Set[str] = set()
+        self._last_sweep = time.monotonic()
+        self._flush_timer: Optional[threading.Timer] = None
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.tasks_dir, key)
+        return base + self._ext, base + ".journal"
+
+    def _stale_path(self, key: str) -> str:
+        # Snapshot left over in the format we are not writing.
+        return os.path.join(self.tasks_dir, key) + self._stale_ext
+
+    def _archive_paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.archive_dir, key)
+        return base + self._ext, base + self._stale_ext
+
+    def _encode_guild(self, guild: _GuildTasks) -> bytes:
+        if self.snapshot_format == "binary":
+            return snapshot.encode_tasks(guild.counter, guild.tasks.values(), guild.info())
+        data = guild.to_json()
+        data.update(guild.info())
+        return _dump_json(data).encode("utf-8")
+
+    def _write_snapshot(self, key: str, data: bytes) -> None:
+        path = self._paths(key)[0]
+        _save_bytes(path, data)
+        _remove_if_exists(self._stale_path(key))
+
+    def _write_archive(self, key: str, data: bytes) -> None:
+        path, stale = self._archive_paths(key)
+        os.makedirs(self.archive_dir, exist_ok=True)
+        _save_bytes(path, data)
+        _remove_if_exists(stale)
+
+    def _schedule_flush(self) -> None:
+        # Callers must hold _lock.
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_delay, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _append(self, shard: _Shard, record: Dict[str, Any]) -> None:
+        line = _encode_record(record)
+        shard.journal.write(line)
+        shard.journal.flush()
+        shard.journal_size += len(line)
+        if self.fsync == "always":
+            os.fsync(shard.journal.fileno())
+        elif self.fsync == "interval":
+            shard.unsynced = True
+            self._schedule_flush()
+        if shard.journal_size >= self.compact_bytes:
+            self._schedule_flush()
+
+    def flush(self) -> None:
+        """Sync pending journal records, save config and compact large journals."""
+        with self._flush_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                # Serialize under the lock so handlers can't mutate mid-dump,
+                # but do the actual disk writes outside it.
+                config_snapshot = self._encode_configs() if self._config_dirty else None
+                self._config_dirty = False
+                busy: Set[str] = set()
+                to_sync: List[_Shard] = []
+                to_compact: List[Tuple[str, _Shard, Optional[bytes], bytes, int]] = []
+                now = time.monotonic()
+                for key, shard in self._shards.items():
+                    if shard.unsynced:
+                        shard.unsynced = False
+                        to_sync.append(shard)
+                        busy.add(key)
+                    archive_data = None
+                    if self.archive_after > 0 and now >= shard.next_archive_check:
+                        shard.next_archive_check = now + min(self.archive_after, 3600.0)
+                        archive_data = self._archive_completed(key, shard)
+                    if archive_data is not None or shard.journal_size >= self.compact_bytes:
+                        to_compact.append(
+                            (key, shard, archive_data, self._encode_guild(shard.guild), shard.journal_size)
+                        )
+                        busy.add(key)
+                self._busy_shards.update(busy)
+
+            try:
+                for shard in to_sync:
+                    try:
+                        os.fsync(shard.journal.fileno())
+                    except (OSError, ValueError):
+                        # Handle was swapped by a whole-guild save, which syncs itself.
+                        pass
+                if config_snapshot is not None:
+                    _save_bytes(self._config_path, config_snapshot)
+                    _remove_if_exists(self._stale_config_path)
+                for key, shard, archive_data, data, offset in to_compact:
+                    # Archive first: a crash in between leaves tasks in both
+                    # files, and the snapshot copy wins on load.
+                    if archive_data is not None:
+                        self._write_archive(key, archive_data)
+                    self._write_snapshot(key, data)
+                    with self._lock:
+                        self._drop_journal_prefix(shard, offset)
+            finally:
+                with self._lock:
+                    self._busy_shards.difference_update(busy)
+
+    def _drop_journal_prefix(self, shard: _Shard, offset: int) -> None:
+        # Everything before `offset` is now in the snapshot; keep only the
+        # records appended while the snapshot was being written.
+        with open(shard.journal_path, "rb") as f:
+            f.seek(offset)
+            tail = f.read()
+        tmp = shard.journal_path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(tail)
+            f.flush()
+            os.fsync(f.fileno())
+        shard.journal.close()
+        os.replace(tmp, shard.journal_path)
+        shard.journal = open(shard.journal_path, "ab")
+        shard.journal_size = len(tail)
+
+    def _read_guild(self, key: str) -> Tuple[Optional[_GuildTasks], int]:
+        snapshot_path, journal_path = self._paths(key)
+        if not os.path.exists(snapshot_path):
+            snapshot_path = self._stale_path(key)
+        if not os.path.exists(snapshot_path) and not os.path.exists(journal_path):
+            return None, 0
+        guild = _load_snapshot(snapshot_path)
+        journal_size = _replay_journal(guild, journal_path)
+        return guild, journal_size
+
+    def _shard(self, guild_id: int, create: bool = False) -> Optional[_Shard]:
+        """Loaded shard for a guild, read from disk on first use. Callers must hold _lock."""
+        key = str(guild_id)
+        now = time.monotonic()
+        shard = self._shards.get(key)
+        if shard is None:
+            guild, journal_size = self._read_guild(key)
+            if guild is None and create:
+                guild = _GuildTasks()
+            if guild is not None:
+                shard = _Shard(*self._paths(key), guild, journal_size)
+                self._shards[key] = shard
+        if shard is not None:
+            shard.last_used = now
+        self._evict_idle(now)
+        return shard
+
+    def _evict_idle(self, now: float) -> None:
+        # Sweep at most a few times per idle period; shards stay loaded
+        # while the flush thread is syncing or compacting them.
+        if now - self._last_sweep < self.idle_evict / 4:
+            return
+        self._last_sweep = now
+        for key, shard in list(self._shards.items()):
+            if key in self._busy_shards:
+                continue
+            if shard.archive is not None and now - shard.archive_used >= self.idle_evict:
+                shard.archive = None
+            if now - shard.last_used >= self.idle_evict and not shard.unsynced:
+                shard.close()
+                del self._shards[key]
+
+    # ---- Archive tier ----
+
+    def _read_archive(self, key: str) -> _GuildTasks:
+        path, stale = self._archive_paths(key)
+        return _load_snapshot(path if os.path.exists(path) else stale)
+
+    def _archive(self, key: str, shard: _Shard) -> _GuildTasks:
+        """The guild's archive, loaded on first use. Callers must hold _lock."""
+        if shard.archive is None:
+            archive = self._read_archive(key)
+            for task_id in [i for i in archive.tasks if i in shard.guild.tasks]:
+                archive.remove(task_id)
+            shard.archive = archive
+        shard.archive_used = time.monotonic()
+        return shard.archive
+
+    def _archived_task(self, key: str, shard: _Shard, task_id: int) -> Optional[Task]:
+        if shard.archive is not None:
+            return shard.archive.tasks.get(task_id)
+        path = self._archive_paths(key)[0]
+        if self.snapshot_format == "binary" and os.path.exists(path):
+            # One record straight from the mapped file, without loading the rest.
+            try:
+                with snapshot.SnapshotReader(path) as reader:
+                    return reader.read_task(task_id)
+            except snapshot.SnapshotError:
+                pass
+        return self._archive(key, shard).tasks.get(task_id)
+
+    def _archive_completed(self, key: str, shard: _Shard) -> Optional[bytes]:
+        """
+        Move tasks completed more than archive_after seconds ago into the
+        archive. Returns the new archive file contents, or None if nothing
+        moved. Callers must hold _lock.
+        """
+        guild = shard.guild
+        cutoff = time.time() - self.archive_after
+        due = [
+            task_id for task_id in guild.index.by_status.get(TaskStatus.COMPLETED, [])
+            if (guild.tasks[task_id].completed_at or 0) <= cutoff
+        ]
+        if not due:
+            return None
+        archive = self._archive(key, shard)
+        for task_id in due:
+            archive.put(guild.remove(task_id))
+        guild.archived = archive.counts()
+        return self._encode_guild(archive)
+
+    def _unarchive_record(self, key: str, shard: _Shard, task_id: int) -> Optional[Dict[str, Any]]:
+        if task_id in shard.guild.tasks:
+            return None
+        task = self._archived_task(key, shard, task_id)
+        return {"op": "unarchive", "task": task.to_dict()} if task else None
+
+    def _commit(self, shard: _Shard, records: List[Dict[str, Any]]) -> None:
+        record = records[0] if len(records) == 1 else {"op": "batch", "ops": records}
+        shard.guild.apply(record)
+        if shard.archive is not None:
+            for r in records:
+                if r["op"] == "unarchive":
+                    shard.archive.remove(r["task"]["id"])
+        # One journal line, so a crash keeps all of the batch or none of it.
+        self._append(shard, record)
+
+    # ---- Server config ----
+
+    def _open_configs(self) -> None:
+        path = self._config_path if os.path.exists(self._config_path) else self._stale_config_path
+        if path.endswith(".snap") and os.path.exists(path):
+            # Guild sections are decoded from the mapped file on first use.
+            try:
+                self._config_reader = snapshot.SnapshotReader(path)
+            except snapshot.SnapshotError:
+                _move_aside(path)
+        else:
+            self._configs = _load_json(path)
+
+    def _config(self, key: str) -> Optional[Dict[str, Any]]:
+        # Callers must hold _lock.
+        cfg = self._configs.get(key)
+        if cfg is None and self._config_reader is not None:
+            cfg = self._config_reader.read_json(int(key))
+            if cfg is not None:
+                self._configs[key] = cfg
+        return cfg
+
+    def _load_all_configs(self) -> None:
+        if self._config_reader is not None:
+            for key in self._config_reader.keys():
+                self._config(str(key))
+            self._config_reader.close()
+            self._config_reader = None
+
+    def _encode_configs(self) -> bytes:
+        self._load_all_configs()
+        if self.snapshot_format == "binary":
+            return snapshot.encode_json_sections(self._configs)
+        return _dump_json(self._configs).encode("utf-8")
+
+    def get_server_config(self, guild_id: int) -> Dict[str, Any]:
+        with self._lock:
+            return copy.deepcopy(self._config(str(guild_id)) or {})
+
+    def set_server_config(self, guild_id: int, new_config: Dict[str, Any]) -> None:
+        with self._lock:
+            self._configs[str(guild_id)] = copy.deepcopy(new_config)
+            self._config_dirty = True
+            self._schedule_flush()
+
+    def get_all_configs(self) -> Dict[str, Any]:
+        with self._lock:
+            self._load_all_configs()
+            return copy.deepcopy(self._configs)
+
+    # ---- Tasks ----
+
+    def _stored_guild_keys(self) -> Set[str]:
+        return {
+            name.rsplit(".", 1)[0]
+            for name in os.listdir(self.tasks_dir)
+            if name.endswith((".json", ".snap", ".journal"))
+        }
+
+    def _full_json(self, key: str, guild: _GuildTasks, archive: _GuildTasks) -> Dict[str, Any]:
+        data = guild.to_json()
+        for task_id, task in archive.tasks.items():
+            if task_id not in guild.tasks:
+                data["tasks"][str(task_id)] = task.to_dict()
+        data["tasks"] = dict(sorted(data["tasks"].items(), key=lambda item: int(item[0])))
+        return data
+
+    def get_all_tasks(self) -> Dict[str, Any]:
+        # Reads cold guilds straight from disk without keeping them loaded.
+        with self._lock:
+            result = {}
+            for key in self._stored_guild_keys() | set(self._shards):
+                if key in self._shards:
+                    shard = self._shards[key]
+                    result[key] = self._full_json(key, shard.guild, self._archive(key, shard))
+                else:
+                    result[key] = self._full_json(key, self._read_guild(key)[0], self._read_archive(key))
+            return result
+
+    def set_all_tasks(self, data: Dict[str, Any]) -> None:
+        with self._lock:
+            for key in self._stored_guild_keys() - set(data):
+                for path in (*self._paths(key), self._stale_path(key), *self._archive_paths(key)):
+                    _remove_if_exists(path)
+                if key in self._shards:
+                    self._shards.pop(key).close()
+            for key, guild_data in data.items():
+                self.save_guild_tasks(int(key), guild_data)
+
+    def get_guild_tasks(self, guild_id: int) -> Dict[str, Any]:
+        with self._lock:
+            shard = self._shard(guild_id)
+            if not shard:
+                return _GuildTasks().to_json()
+            return self._full_json(str(guild_id), shard.guild, self._archive(str(guild_id), shard))
+
+    def save_guild_tasks(self, guild_id: int, guild_data: Dict[str, Any]) -> None:
+        # Whole-guild replacement: write the snapshot directly and start a
+        # fresh journal rather than journaling every task. Everything starts
+        # out hot again; old tasks are re-archived on the next pass.
+        key = str(guild_id)
+        with self._lock:
+            shard = self._shard(guild_id, create=True)
+            shard.guild = _GuildTasks.from_json(guild_data)
+            shard.guild.archived = {}
+            shard.archive = None
+            shard.next_archive_check = 0.0
+            for path in self._archive_paths(key):
+                _remove_if_exists(path)
+            self._write_snapshot(key, self._encode_guild(shard.guild))
+            self._drop_journal_prefix(shard, shard.journal_size)
+
+    def create_task(self, guild_id: int, task: Task) -> Task:
+        with self._lock:
+            shard = self._shard(guild_id, create=True)
+            task = task.copy()
+            task.id = shard.guild.counter + 1
+            shard.guild.put(task)
+            self._append(shard, {"op": "create", "task": task.to_dict()})
+            return task.copy()
+
+    def update_task(self, guild_id: int, task_id: int, fields: Dict[str, Any]) -> Optional[Task]:
+        with self._lock:
+            shard = self._shard(guild_id)
+            if not shard:
+                return None
+            unarchive = self._unarchive_record(str(guild_id), shard, task_id)
+            if unarchive is None and task_id not in shard.guild.tasks:
+                return None
+            update = {"op": "update", "id": task_id, "fields": encode_fields(fields)}
+            self._commit(shard, [unarchive, update] if unarchive else [update])
+            return shard.guild.tasks[task_id].copy()
+
+    def allocate_task_id(self, guild_id: int) -> int:
+        with self._lock:
+            shard = self._shard(guild_id, create=True)
+            shard.guild.counter += 1
+            # Persist the reservation so a crash before commit can't hand
+            # the same ID out twice.
+            self._append(shard, {"op": "counter", "value": shard.guild.counter})
+            return shard.guild.counter
+
+    def apply_ops(self, guild_id: int, ops: List[Tuple[Any, ...]]) -> None:
+        key = str(guild_id)
+        with self._lock:
+            records = []
+            shard = None
+            for op in ops:
+                if op[0] == "config":
+                    self._configs[key] = self._config(key) or {}
+                    self._configs[key].update(copy.deepcopy(op[1]))
+                    self._config_dirty = True
+                    self._schedule_flush()
+                    continue
+                shard = shard or self._shard(guild_id, create=True)
+                if op[0] == "create":
+                    records.append({"op": "create", "task": op[1].to_dict()})
+                elif op[0] == "update":
+                    unarchive = self._unarchive_record(key, shard, op[1])
+                    if unarchive:
+                        records.append(unarchive)
+                    records.append({"op": "update", "id": op[1], "fields": encode_fields(op[2])})
+            if records:
+                self._commit(shard, records)
+
+    def get_task(self, guild_id: int, task_id: int) -> Optional[Task]:
+        with self._lock:
+            shard = self._shard(guild_id)
+            if not shard:
+                return None
+            task = shard.guild.tasks.get(task_id) or self._archived_task(str(guild_id), shard, task_id)
+            return task.copy() if task else None
+
+    def list_tasks(self, guild_id: int) -> Dict[str, Task]:
+        with self._lock:
+            shard = self._shard(guild_id)
+            if not shard:
+                return {}
+            archive = self._archive(str(guild_id), shard)
+            tasks = {**archive.tasks, **shard.guild.tasks}
+            return {str(task_id): tasks[task_id].copy() for task_id in sorted(tasks)}
+
+    @staticmethod
+    def _covers_archive(statuses: Optional[Iterable[TaskStatus]]) -> bool:
+        # Only Completed tasks are ever archived.
+        return statuses is None or TaskStatus.COMPLETED in statuses
+
+    def query_tasks(
+        self,
+        guild_id: int,
+        statuses: Optional[Iterable[TaskStatus]] = None,
+        assignee_id: Optional[int] = None,
+        priorities: Optional[Iterable[TaskPriority]] = None,
+        limit: Optional[int] = None,
+        include_archived: bool = True,
+        after_id: Optional[int] = None,
+        before_id: Optional[int] = None,
+    ) -> List[Task]:
+        with self._lock:
+            shard = self._shard(guild_id)
+            if not shard:
+                return []
+            guild = shard.guild
+            ids = guild.index.query(statuses, assignee_id, priorities, limit, after_id, before_id)
+            if not (
+                include_archived
+                and self._covers_archive(statuses)
+                and guild.archived_count(assignee_id, priorities)
+            ):
+                return [guild.tasks[i].copy() for i in ids]
+            archive = self._archive(str(guild_id), shard)
+            archived_ids = archive.index.query(None, assignee_id, priorities, limit, after_id, before_id)
+            merged = list(heapq.merge(ids, archived_ids))
+            if limit is not None:
+                # Both inputs are already pages; keep the end nearest the cursor.
+                merged = merged[-limit:] if before_id is not None else merged[:limit]
+            return [(guild.tasks.get(i) or archive.tasks[i]).copy() for i in merged]
+
+    def count_tasks(
+        self,
+        guild_id: int,
+        statuses: Optional[Iterable[TaskStatus]] = None,
+        assignee_id: Optional[int] = None,
+        priorities: Optional[Iterable[TaskPriority]] = None,
+    ) -> int:
+        with self._lock:
+            shard = self._shard(guild_id)
+            if not shard:
+                return 0
+            count = shard.guild.index.count(statuses, assignee_id, priorities)
+            if self._covers_archive(statuses):
+                count += shard.guild.archived_count(assignee_id, priorities)
+            return count
@@ -0,0 +1,165 @@
+"""
+Batched delivery of log embeds to each guild's logs channel.
+
+Handlers call `log_sink.post(channel, embed)`, which never waits on
+Discord. A per-guild worker sends buffered embeds up to 10 per message,
+either every LOG_FLUSH_INTERVAL seconds or as soon as 10 are waiting. Each
+guild keeps at most LOG_BUFFER_SIZE unsent embeds; past that the oldest
+are dropped, so a flood of events can't grow memory or starve other sends.
+
+Guilds that opt in (`/config channels logs_webhook:true`) get their logs
+through a webhook the bot owns in the logs channel. Webhook executes are
+rate-limited separately from the bot's own messages, so audit traffic
+doesn't eat into the budget for task panel and board edits. If the webhook
+is deleted, logs fall back to normal sends until it is enabled again.
+"""
+import asyncio
+import logging
+import os
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import discord
+
+from utils import metrics
+from utils.outbound import Priority, channel_route, outbound
+
+log = logging.getLogger(__name__)
+
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "2.0"))
+LOG_BUFFER_SIZE = int(os.getenv("LOG_BUFFER_SIZE", "200"))
+
+# Discord's limit on embeds per message.
+MAX_EMBEDS_PER_MESSAGE = 10
+
+WEBHOOK_NAME = "Dev Bot Logs"
+
+_Entry = Tuple[discord.TextChannel, bool, discord.Embed]
+
+
+class LogSink:
+    def __init__(self, flush_interval: float = LOG_FLUSH_INTERVAL, max_buffered: int = LOG_BUFFER_SIZE):
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self._buffers: Dict[int, Deque[_Entry]] = {}
+        self._wakeups: Dict[int, asyncio.Event] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+        # channel id -> the bot's webhook there, or None once we know there
+        # isn't a usable one.
+        self._webhooks: Dict[int, Optional[discord.Webhook]] = {}
+        self._closing = False
+
+    def post(self, channel: discord.TextChannel, embed: discord.Embed, via_webhook: bool = False) -> None:
+        key = channel.guild.id
+        buf = self._buffers.get(key)
+        if buf is None:
+            buf = self._buffers[key] = deque(maxlen=self.max_buffered)
+        if len(buf) == buf.maxlen:
+            metrics.incr("log_dropped")
+        buf.append((channel, via_webhook, embed))
+        metrics.incr("log_events")
+        if key not in self._workers:
+            self._wakeups[key] = asyncio.Event()
+            self._workers[key] = asyncio.create_task(self._worker(key))
+        if len(buf) >= MAX_EMBEDS_PER_MESSAGE:
+            self._wakeups[key].set()
+
+    async def _worker(self, key: int) -> None:
+        buf = self._buffers[key]
+        wake = self._wakeups[key]
+        try:
+            while buf:
+                if len(buf) < MAX_EMBEDS_PER_MESSAGE and not self._closing:
+                    try:
+                        await asyncio.wait_for(wake.wait(), self.flush_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                wake.clear()
+                await self._send_batch(buf)
+        finally:
+            self._workers.pop(key, None)
+            self._wakeups.pop(key, None)
+            if not buf:
+                self._buffers.pop(key, None)
+
+    async def _send_batch(self, buf: Deque[_Entry]) -> None:
+        # One message only ever goes to one channel by one transport; a
+        # config change in the middle of a burst just splits the batch.
+        channel, via_webhook, _ = buf[0]
+        embeds: List[discord.Embed] = []
+        while (
+            buf
+            and len(embeds) < MAX_EMBEDS_PER_MESSAGE
+            and buf[0][0].id == channel.id
+            and buf[0][1] == via_webhook
+        ):
+            embeds.append(buf.popleft()[2])
+        try:
+            await self.send(channel, embeds, via_webhook)
+            metrics.incr("log_messages")
+        except discord.HTTPException as e:
+            metrics.incr("log_send_failed")
+            log.warning("Dropping %d log embeds for #%s: %s", len(embeds), channel, e)
+
+    async def send(self, channel: discord.TextChannel, embeds: List[discord.Embed], via_webhook: bool = False) -> None:
+        if via_webhook:
+            webhook = await self._find_webhook(channel)
+            if webhook is not None:
+                try:
+                    await outbound.run(Priority.LOG, f"webhook:{webhook.id}", lambda: webhook.send(embeds=embeds))
+                    metrics.incr("log_webhook_messages")
+                    return
+                except discord.NotFound:
+                    log.warning("Log webhook in #%s was deleted; falling back to normal sends", channel)
+                    self._webhooks[channel.id] = None
+                    metrics.incr("log_webhook_lost")
+        await outbound.run(Priority.LOG, channel_route(channel.id), lambda: channel.send(embeds=embeds))
+
+    async def _find_webhook(self, channel: discord.TextChannel) -> Optional[discord.Webhook]:
+        """
+        The bot's log webhook in `channel`, looked up once per process.
+        Never creates one; that only happens through `create_webhook`.
+        """
+        if channel.id in self._webhooks:
+            return self._webhooks[channel.id]
+        webhook = None
+        try:
+            for hook in await channel.webhooks():
+                owned = hook.user is not None and hook.user.id == channel.guild.me.id
+                if owned and hook.token and hook.name == WEBHOOK_NAME:
+                    webhook = hook
+                    break
+        except discord.HTTPException as e:
+            log.warning("Could not list webhooks in #%s: %s", channel, e)
+        self._webhooks[channel.id] = webhook
+        return webhook
+
+    async def create_webhook(self, channel: discord.TextChannel) -> Optional[discord.Webhook]:
+        """
+        Returns the bot's log webhook in `channel`, creating it if needed.
+        None if the bot lacks Manage Webhooks there.
+        """
+        self._webhooks.pop(channel.id, None)
+        webhook = await self._find_webhook(channel)
+        if webhook is None:
+            try:
+                webhook = await channel.create_webhook(name=WEBHOOK_NAME, reason="Log delivery")
+            except discord.HTTPException as e:
+                log.warning("Could not create log webhook in #%s: %s", channel, e)
+                return None
+            self._webhooks[channel.id] = webhook
+        return webhook
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """Send whatever is buffered now, waiting at most `timeout` seconds."""
+        self._closing = True
+        for wake in self._wakeups.values():
+            wake.set()
+        workers = list(self._workers.values())
+        if workers:
+            done, pending = await asyncio.wait(workers, timeout=timeout)
+            for worker in pending:
+                worker.cancel()
+
+
+log_sink = LogSink()
@@ -0,0 +1,50 @@
+from collections import OrderedDict
+from typing import Hashable
+
+
+class DeletedMessages:
+    """
+    IDs of messages known to be gone (an edit returned NotFound, or the
+    gateway reported the delete), so later edits can skip the REST call.
+    Only the most recent `maxsize` IDs are kept.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._ids: "OrderedDict[Hashable, None]" = OrderedDict()
+
+    def add(self, message_id: int) -> None:
+        self._ids[message_id] = None
+        self._ids.move_to_end(message_id)
+        if len(self._ids) > self.maxsize:
+            self._ids.popitem(last=False)
+
+    def __contains__(self, message_id: object) -> bool:
+        return message_id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+class SentContent:
+    """
+    A digest of what was last sent to each message, so an edit that would
+    leave the message looking the same can be skipped. Only the most recent
+    `maxsize` messages are kept; a forgotten one just gets edited again.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._digests: "OrderedDict[int, int]" = OrderedDict()
+
+    def unchanged(self, message_id: int, digest: int) -> bool:
+        return self._digests.get(message_id) == digest
+
+    def remember(self, message_id: int, digest: int) -> None:
+        self._digests[message_id] = digest
+        self._digests.move_to_end(message_id)
+        if len(self._digests) > self.maxsize:
+            self._digests.popitem(last=False)
+
+    def forget(self, message_id: int) -> None:
+        self._digests.pop(message_id, None)
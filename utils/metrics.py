@@ -0,0 +1,49 @@
+"""
+In-process counters and latency samples, served as plain text on the web
+server's /metrics route.
+"""
+from collections import defaultdict, deque
+from typing import Deque, Dict
+
+# Quantiles are computed over the most recent samples only.
+SAMPLE_WINDOW = 2048
+
+_counters: Dict[str, float] = defaultdict(float)
+_samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=SAMPLE_WINDOW))
+
+
+def incr(name: str, value: float = 1) -> None:
+    _counters[name] += value
+
+
+def observe(name: str, value: float) -> None:
+    """Record one sample; exported as `<name>_p50`, `<name>_p99` and `<name>_count`."""
+    _samples[name].append(value)
+    _counters[f"{name}_count"] += 1
+
+
+def quantile(name: str, q: float) -> float:
+    samples = sorted(_samples.get(name, ()))
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+def get(name: str) -> float:
+    return _counters.get(name, 0)
+
+
+def snapshot() -> Dict[str, float]:
+    return dict(_counters)
+
+
+def render_text() -> str:
+    """One `name value` line per metric, sorted by name."""
+    values = snapshot()
+    for name in list(_samples):
+        values[f"{name}_p50"] = quantile(name, 0.5)
+        values[f"{name}_p99"] = quantile(name, 0.99)
+    lines = []
+    for name, value in sorted(values.items()):
+        lines.append(f"{name} {value:g}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,153 @@
+import enum
+from collections.abc import Mapping
+from dataclasses import dataclass, fields as dataclass_fields, replace
+from typing import Any, Dict, Iterator, Optional
+
+
+class TaskStatus(str, enum.Enum):
+    OPEN = "Open"
+    IN_PROGRESS = "In Progress"
+    COMPLETED = "Completed"
+
+    def __str__(self) -> str:
+        return self.value
+
+    @classmethod
+    def parse(cls, value: Any) -> Optional["TaskStatus"]:
+        """Case-insensitive lookup by label; None if it isn't a known status."""
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, str):
+            return _STATUS_BY_KEY.get(value.strip().lower())
+        return None
+
+
+class TaskPriority(str, enum.Enum):
+    LOW = "Low"
+    MEDIUM = "Medium"
+    HIGH = "High"
+
+    def __str__(self) -> str:
+        return self.value
+
+    @classmethod
+    def parse(cls, value: Any, default: Optional["TaskPriority"] = None) -> Optional["TaskPriority"]:
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, str):
+            return _PRIORITY_BY_KEY.get(value.strip().lower(), default)
+        return default
+
+
+_STATUS_BY_KEY = {s.value.lower(): s for s in TaskStatus}
+_PRIORITY_BY_KEY = {p.value.lower(): p for p in TaskPriority}
+
+
+@dataclass(slots=True)
+class Task:
+    """
+    One task. Status and priority are shared enum members rather than
+    per-task strings, and slots avoid a dict per instance. to_dict() and
+    from_dict() convert to and from the JSON layout used on disk.
+    """
+
+    id: int
+    title: str
+    description: str
+    priority: TaskPriority
+    status: TaskStatus
+    creator_id: int
+    assignee_id: Optional[int] = None
+    message_id: Optional[int] = None
+    channel_id: Optional[int] = None
+    thread_id: Optional[int] = None
+    completed_at: Optional[int] = None
+    # Keys this model doesn't know about, kept so they survive a round trip.
+    extra: Optional[Dict[str, Any]] = None
+
+    def update(self, **changes: Any) -> "Task":
+        for key, value in changes.items():
+            if key == "status":
+                value = TaskStatus.parse(value) or TaskStatus.OPEN
+            elif key == "priority":
+                value = TaskPriority.parse(value, TaskPriority.MEDIUM)
+            if key in TASK_FIELDS:
+                setattr(self, key, value)
+            else:
+                if self.extra is None:
+                    self.extra = {}
+                self.extra[key] = value
+        return self
+
+    def copy(self) -> "Task":
+        return replace(self, extra=dict(self.extra) if self.extra else None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "id": self.id,
+            "title": self.title,
+            "description": self.description,
+            "priority": self.priority.value,
+            "status": self.status.value,
+            "creator_id": self.creator_id,
+            "assignee_id": self.assignee_id,
+            "message_id": self.message_id,
+            "channel_id": self.channel_id,
+            "thread_id": self.thread_id,
+        }
+        if self.completed_at is not None:
+            data["completed_at"] = self.completed_at
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Task":
+        task = cls(
+            id=int(data["id"]),
+            title=data.get("title", ""),
+            description=data.get("description", ""),
+            priority=TaskPriority.parse(data.get("priority"), TaskPriority.MEDIUM),
+            status=TaskStatus.parse(data.get("status")) or TaskStatus.OPEN,
+            creator_id=data.get("creator_id"),
+        )
+        rest = {k: v for k, v in data.items() if k not in _CORE_FIELDS}
+        if rest:
+            task.update(**rest)
+        return task
+
+
+TASK_FIELDS = frozenset(f.name for f in dataclass_fields(Task)) - {"extra"}
+_CORE_FIELDS = frozenset({"id", "title", "description", "priority", "status", "creator_id"})
+
+
+def encode_fields(changes: Dict[str, Any]) -> Dict[str, Any]:
+    """A dict of task changes in the JSON layout (enum members as labels)."""
+    return {k: v.value if isinstance(v, enum.Enum) else v for k, v in changes.items()}
+
+
+class ConfigSnapshot(Mapping):
+    """
+    Read-only view of one guild's server config as of `version`. Snapshots
+    are shared between handlers, so never mutate the values they hold; to
+    change config, go through update_server_config.
+    """
+
+    __slots__ = ("guild_id", "version", "_data")
+
+    def __init__(self, guild_id: int, version: int, data: Dict[str, Any]):
+        self.guild_id = guild_id
+        self.version = version
+        self._data = data
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"ConfigSnapshot(guild_id={self.guild_id}, version={self.version}, {self._data!r})"
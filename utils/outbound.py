@@ -0,0 +1,157 @@
+"""
+Central queue for outbound Discord REST calls made outside an interaction
+response.
+
+Interaction responses never pass through here: they are sent inline on the
+interaction token, which has its own rate limit, so they always go first.
+Everything else is queued by priority class:
+
+  TASK_EDIT  user-visible task messages and threads
+  BOARD      task board edits
+  LOG        log channel sends
+
+At most OUTBOUND_CONCURRENCY calls run at once, of which at most
+OUTBOUND_BACKGROUND_CONCURRENCY are BOARD or LOG, so a backlog of board and
+log traffic can't hold every slot. Calls on the same route (the channel or
+webhook Discord rate-limits them by) run one at a time, so a rate-limited
+route ties up one slot instead of all of them.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set
+
+from utils import metrics
+
+log = logging.getLogger(__name__)
+
+OUTBOUND_CONCURRENCY = int(os.getenv("OUTBOUND_CONCURRENCY", "4"))
+OUTBOUND_BACKGROUND_CONCURRENCY = int(os.getenv("OUTBOUND_BACKGROUND_CONCURRENCY", "2"))
+
+
+class Priority(IntEnum):
+    TASK_EDIT = 0
+    BOARD = 1
+    LOG = 2
+
+    @property
+    def background(self) -> bool:
+        return self is not Priority.TASK_EDIT
+
+
+def channel_route(channel_id: int) -> str:
+    return f"channel:{channel_id}"
+
+
+class _Job:
+    __slots__ = ("priority", "route", "fn", "future", "queued_at")
+
+    def __init__(self, priority: Priority, route: str, fn: Callable[[], Awaitable[Any]], future: asyncio.Future):
+        self.priority = priority
+        self.route = route
+        self.fn = fn
+        self.future = future
+        self.queued_at = time.monotonic()
+
+
+class OutboundQueue:
+    def __init__(
+        self,
+        concurrency: int = OUTBOUND_CONCURRENCY,
+        background_concurrency: int = OUTBOUND_BACKGROUND_CONCURRENCY,
+    ):
+        self.concurrency = concurrency
+        self.background_concurrency = background_concurrency
+        self._queues: Dict[Priority, Deque[_Job]] = {p: deque() for p in Priority}
+        self._busy_routes: Set[str] = set()
+        self._running: Set[asyncio.Task] = set()
+        self._running_background = 0
+
+    async def run(self, priority: Priority, route: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Queue `fn()` and wait for its result."""
+        return await self.submit(priority, route, fn)
+
+    def submit(self, priority: Priority, route: str, fn: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        """Queue `fn()` and return a future for its result."""
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_log_unretrieved)
+        self._queues[priority].append(_Job(priority, route, fn, future))
+        metrics.incr(f"outbound_{priority.name.lower()}_queued")
+        self._pump()
+        return future
+
+    def pending(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def _next_job(self) -> Optional[_Job]:
+        for priority, queue in self._queues.items():
+            if priority.background and self._running_background >= self.background_concurrency:
+                break
+            # Drop calls whose caller gave up (cancelled) while they waited.
+            for job in [job for job in queue if job.future.done()]:
+                queue.remove(job)
+            for i, job in enumerate(queue):
+                if job.route not in self._busy_routes:
+                    del queue[i]
+                    return job
+        return None
+
+    def _pump(self) -> None:
+        while len(self._running) < self.concurrency:
+            job = self._next_job()
+            if job is None:
+                return
+            self._busy_routes.add(job.route)
+            if job.priority.background:
+                self._running_background += 1
+            task = asyncio.create_task(self._run_job(job))
+            self._running.add(task)
+            task.add_done_callback(self._job_done)
+
+    async def _run_job(self, job: _Job) -> None:
+        name = job.priority.name.lower()
+        metrics.incr(f"outbound_{name}_wait_seconds", time.monotonic() - job.queued_at)
+        try:
+            result = await job.fn()
+        except asyncio.CancelledError:
+            job.future.cancel()
+            raise
+        except Exception as e:
+            metrics.incr(f"outbound_{name}_failed")
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            metrics.incr(f"outbound_{name}_sent")
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self._busy_routes.discard(job.route)
+            if job.priority.background:
+                self._running_background -= 1
+
+    def _job_done(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        self._pump()
+
+    async def close(self) -> None:
+        """Drop queued calls and cancel running ones."""
+        for queue in self._queues.values():
+            for job in queue:
+                job.future.cancel()
+            queue.clear()
+        running = list(self._running)
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+
+def _log_unretrieved(future: asyncio.Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        # Marks the exception retrieved; awaiting callers still get it.
+        log.debug("Outbound call failed: %r", future.exception())
+
+
+outbound = OutboundQueue()
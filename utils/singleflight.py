@@ -0,0 +1,34 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from utils import metrics
+
+
+class SingleFlight:
+    """
+    Concurrent calls with the same key share one run of `fn`: the first
+    caller starts it, later callers wait for the same result (or
+    exception). A waiter being cancelled doesn't cancel the shared run.
+    Counters `<name>_calls` and `<name>_shared` go to utils.metrics.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        metrics.incr(f"{self.name}_calls")
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            metrics.incr(f"{self.name}_shared")
+        return await asyncio.shield(task)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    def __len__(self) -> int:
+        return len(self._inflight)
@@ -0,0 +1,235 @@
+"""
+Compact binary snapshot format, an alternative to indented JSON files.
+
+A snapshot is a header, an index of (key, offset, length) entries sorted
+by key, then the sections themselves:
+
+    magic "DMBS" | version u16 | meta u64 | count u32
+    count x (key i64 | offset u64 | length u32)
+    sections...
+
+Files are read through mmap, so one section (a guild's config, a single
+task) can be decoded without touching the rest. Task sections use a fixed
+struct for the enum and ID fields followed by length-prefixed UTF-8 text;
+task files may also carry a JSON section under key 0 (INFO_KEY) for
+guild-level data such as archive counts.
+
+    python -m utils.snapshot data/tasks/123.snap     # print as JSON
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.models import Task, TaskPriority, TaskStatus
+
+MAGIC = b"DMBS"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sHQI")
+_ENTRY = struct.Struct("<qQI")
+# id, priority, status, mask of set optional ints, then the optional ints
+# (creator, assignee, message, channel, thread, completed_at), then the
+# byte lengths of title, description and extra JSON.
+_TASK = struct.Struct("<qBBHqqqqqqIII")
+_OPTIONAL_INTS = ("creator_id", "assignee_id", "message_id", "channel_id", "thread_id", "completed_at")
+
+_STATUSES = tuple(TaskStatus)
+_PRIORITIES = tuple(TaskPriority)
+_STATUS_CODES = {s: i for i, s in enumerate(_STATUSES)}
+_PRIORITY_CODES = {p: i for i, p in enumerate(_PRIORITIES)}
+
+
+# Task IDs start at 1, so key 0 is free for guild-level metadata.
+INFO_KEY = 0
+
+
+class SnapshotError(ValueError):
+    """The file is not a readable snapshot."""
+
+
+def encode_snapshot(meta: int, sections: Iterable[Tuple[int, bytes]]) -> bytes:
+    sections = sorted(sections, key=lambda s: s[0])
+    offset = _HEADER.size + _ENTRY.size * len(sections)
+    parts = [_HEADER.pack(MAGIC, VERSION, meta, len(sections))]
+    for key, data in sections:
+        parts.append(_ENTRY.pack(key, offset, len(data)))
+        offset += len(data)
+    parts.extend(data for _, data in sections)
+    return b"".join(parts)
+
+
+class SnapshotReader:
+    """Memory-mapped view of a snapshot file; use as a context manager."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < _HEADER.size:
+                raise SnapshotError(f"{path} is truncated")
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, self.meta, count = _HEADER.unpack_from(self._buf, 0)
+            if magic != MAGIC or version != VERSION:
+                raise SnapshotError(f"{path} is not a version {VERSION} snapshot")
+            self._count = count
+            if count:
+                _, offset, length = self._entry(count - 1)
+                if offset + length > len(self._buf):
+                    raise SnapshotError(f"{path} is truncated")
+        except (struct.error, SnapshotError) as e:
+            self._buf.close()
+            if isinstance(e, SnapshotError):
+                raise
+            raise SnapshotError(f"{path} is truncated") from e
+
+    def __enter__(self) -> "SnapshotReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._buf.close()
+
+    def _entry(self, i: int) -> Tuple[int, int, int]:
+        return _ENTRY.unpack_from(self._buf, _HEADER.size + i * _ENTRY.size)
+
+    def _entries(self) -> Iterator[Tuple[int, int, int]]:
+        end = _HEADER.size + self._count * _ENTRY.size
+        return _ENTRY.iter_unpack(self._buf[_HEADER.size:end])
+
+    def keys(self) -> List[int]:
+        return [key for key, _, _ in self._entries()]
+
+    def _locate(self, key: int) -> Optional[Tuple[int, int]]:
+        # Binary search straight over the mapped index, so a lookup only
+        # touches a handful of its pages.
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entry(mid)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count:
+            found, offset, length = self._entry(lo)
+            if found == key:
+                return offset, length
+        return None
+
+    def read(self, key: int) -> Optional[bytes]:
+        loc = self._locate(key)
+        if loc is None:
+            return None
+        offset, length = loc
+        return self._buf[offset:offset + length]
+
+    def read_json(self, key: int) -> Any:
+        data = self.read(key)
+        return None if data is None else json.loads(data)
+
+    def read_task(self, task_id: int) -> Optional[Task]:
+        loc = self._locate(task_id) if task_id != INFO_KEY else None
+        return None if loc is None else decode_task(self._buf, loc[0])
+
+    def tasks(self) -> Iterator[Task]:
+        buf = self._buf
+        for key, offset, _ in self._entries():
+            if key != INFO_KEY:
+                yield decode_task(buf, offset)
+
+
+# ---- Tasks ----
+
+def encode_task(task: Task) -> bytes:
+    mask = 0
+    ints = []
+    for bit, name in enumerate(_OPTIONAL_INTS):
+        value = getattr(task, name)
+        if value is None:
+            ints.append(0)
+        else:
+            mask |= 1 << bit
+            ints.append(value)
+    title = task.title.encode("utf-8")
+    description = task.description.encode("utf-8")
+    extra = json.dumps(task.extra, ensure_ascii=False).encode("utf-8") if task.extra else b""
+    return b"".join((
+        _TASK.pack(
+            task.id, _PRIORITY_CODES[task.priority], _STATUS_CODES[task.status], mask,
+            *ints, len(title), len(description), len(extra),
+        ),
+        title,
+        description,
+        extra,
+    ))
+
+
+def decode_task(buf: Any, offset: int) -> Task:
+    task_id, priority, status, mask, *ints, title_len, desc_len, extra_len = _TASK.unpack_from(buf, offset)
+    pos = offset + _TASK.size
+    title = str(buf[pos:pos + title_len], "utf-8")
+    pos += title_len
+    description = str(buf[pos:pos + desc_len], "utf-8")
+    pos += desc_len
+    extra = json.loads(buf[pos:pos + extra_len]) if extra_len else None
+    creator_id, assignee_id, message_id, channel_id, thread_id, completed_at = (
+        value if mask >> bit & 1 else None for bit, value in enumerate(ints)
+    )
+    return Task(
+        task_id, title, description, _PRIORITIES[priority], _STATUSES[status],
+        creator_id, assignee_id, message_id, channel_id, thread_id, completed_at, extra,
+    )
+
+
+def encode_tasks(counter: int, tasks: Iterable[Task], info: Optional[Dict[str, Any]] = None) -> bytes:
+    """A guild's task snapshot; the header's meta field holds the ID counter."""
+    sections = [(task.id, encode_task(task)) for task in tasks]
+    if info:
+        sections.append((INFO_KEY, json.dumps(info, separators=(",", ":")).encode("utf-8")))
+    return encode_snapshot(counter, sections)
+
+
+def read_tasks(path: str) -> Tuple[int, Dict[int, Task], Dict[str, Any]]:
+    """(counter, tasks by ID, info section or {})."""
+    with SnapshotReader(path) as reader:
+        return reader.meta, {task.id: task for task in reader.tasks()}, reader.read_json(INFO_KEY) or {}
+
+
+# ---- JSON sections (server config) ----
+
+def encode_json_sections(data: Dict[str, Any]) -> bytes:
+    return encode_snapshot(0, (
+        (int(key), json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+        for key, value in data.items()
+    ))
+
+
+def to_json(path: str, kind: str = "auto") -> Dict[str, Any]:
+    """Decode a whole snapshot into the layout of the equivalent JSON file."""
+    with SnapshotReader(path) as reader:
+        if kind == "auto":
+            kind = "config" if path.endswith("server_config.snap") else "tasks"
+        if kind == "config":
+            return {str(key): reader.read_json(key) for key in reader.keys()}
+        data = {"counter": reader.meta, "tasks": {str(t.id): t.to_dict() for t in reader.tasks()}}
+        data.update(reader.read_json(INFO_KEY) or {})
+        return data
+
+
+def main(argv: List[str]) -> int:
+    if len(argv) not in (2, 3):
+        print("usage: python -m utils.snapshot <file.snap> [tasks|config]", file=sys.stderr)
+        return 2
+    path = argv[1]
+    if not os.path.exists(path):
+        print(f"{path}: no such file", file=sys.stderr)
+        return 1
+    print(json.dumps(to_json(path, argv[2] if len(argv) == 3 else "auto"), indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
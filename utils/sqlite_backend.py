@@ -0,0 +1,320 @@
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.models import Task, TaskPriority, TaskStatus
+
+# Task keys that have their own column; anything else passed to
+# update_task(**kwargs) is kept in the `extra` JSON column.
+TASK_COLUMNS = (
+    "title",
+    "description",
+    "priority",
+    "status",
+    "creator_id",
+    "assignee_id",
+    "message_id",
+    "channel_id",
+    "thread_id",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS server_config (
+    guild_id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS task_counters (
+    guild_id INTEGER PRIMARY KEY,
+    counter INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    guild_id INTEGER NOT NULL,
+    task_id INTEGER NOT NULL,
+    title TEXT,
+    description TEXT,
+    priority TEXT,
+    status TEXT,
+    creator_id INTEGER,
+    assignee_id INTEGER,
+    message_id INTEGER,
+    channel_id INTEGER,
+    thread_id INTEGER,
+    extra TEXT,
+    PRIMARY KEY (guild_id, task_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (guild_id, status, task_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_assignee ON tasks (guild_id, assignee_id, task_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks (guild_id, priority, task_id);
+"""
+
+
+def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    task = {"id": row["task_id"]}
+    for col in TASK_COLUMNS:
+        task[col] = row[col]
+    if row["extra"]:
+        task.update(json.loads(row["extra"]))
+    return task
+
+
+def _row_to_task(row: sqlite3.Row) -> Task:
+    return Task.from_dict(_row_to_dict(row))
+
+
+def _split_fields(fields: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    columns = {k: v for k, v in fields.items() if k in TASK_COLUMNS}
+    extra = {k: v for k, v in fields.items() if k not in TASK_COLUMNS and k != "id"}
+    return columns, extra
+
+
+class SqliteBackend:
+    """
+    Stores config and tasks in a single SQLite database (WAL mode).
+    Tasks are rows keyed by (guild_id, task_id) so filtered listings are
+    index lookups instead of scans over every guild.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def flush(self) -> None:
+        # Every call commits on its own; nothing is buffered.
+        pass
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _write(self, fn, *args):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(*args)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    # ---- Server config ----
+
+    def get_server_config(self, guild_id: int) -> Dict[str, Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM server_config WHERE guild_id = ?", (guild_id,)
+            ).fetchone()
+        return json.loads(row["data"]) if row else {}
+
+    def set_server_config(self, guild_id: int, new_config: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO server_config (guild_id, data) VALUES (?, ?)",
+                (guild_id, json.dumps(new_config, ensure_ascii=False)),
+            )
+
+    def get_all_configs(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute("SELECT guild_id, data FROM server_config").fetchall()
+        return {str(row["guild_id"]): json.loads(row["data"]) for row in rows}
+
+    # ---- Tasks ----
+
+    def _insert_task(self, guild_id: int, task: Task) -> None:
+        columns, extra = _split_fields(task.to_dict())
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO tasks (guild_id, task_id, {', '.join(TASK_COLUMNS)}, extra) "
+            f"VALUES (?, ?, {', '.join('?' for _ in TASK_COLUMNS)}, ?)",
+            (
+                guild_id,
+                task.id,
+                *(columns.get(col) for col in TASK_COLUMNS),
+                json.dumps(extra, ensure_ascii=False) if extra else None,
+            ),
+        )
+
+    def _replace_guild(self, guild_id: int, guild_data: Dict[str, Any]) -> None:
+        self._conn.execute("DELETE FROM tasks WHERE guild_id = ?", (guild_id,))
+        self._conn.execute(
+            "INSERT OR REPLACE INTO task_counters (guild_id, counter) VALUES (?, ?)",
+            (guild_id, guild_data.get("counter", 0)),
+        )
+        for task in guild_data.get("tasks", {}).values():
+            self._insert_task(guild_id, Task.from_dict(task))
+
+    def _select_guild(self, guild_id: int) -> Dict[str, Any]:
+        row = self._conn.execute(
+            "SELECT counter FROM task_counters WHERE guild_id = ?", (guild_id,)
+        ).fetchone()
+        rows = self._conn.execute(
+            "SELECT * FROM tasks WHERE guild_id = ? ORDER BY task_id", (guild_id,)
+        ).fetchall()
+        return {
+            "counter": row["counter"] if row else 0,
+            "tasks": {str(r["task_id"]): _row_to_dict(r) for r in rows},
+        }
+
+    def get_all_tasks(self) -> Dict[str, Any]:
+        with self._lock:
+            guild_ids = [
+                r["guild_id"]
+                for r in self._conn.execute(
+                    "SELECT guild_id FROM task_counters UNION SELECT DISTINCT guild_id FROM tasks"
+                )
+            ]
+            return {str(gid): self._select_guild(gid) for gid in guild_ids}
+
+    def set_all_tasks(self, data: Dict[str, Any]) -> None:
+        def replace_all():
+            self._conn.execute("DELETE FROM tasks")
+            self._conn.execute("DELETE FROM task_counters")
+            for key, guild_data in data.items():
+                self._replace_guild(int(key), guild_data)
+
+        self._write(replace_all)
+
+    def get_guild_tasks(self, guild_id: int) -> Dict[str, Any]:
+        with self._lock:
+            return self._select_guild(guild_id)
+
+    def save_guild_tasks(self, guild_id: int, guild_data: Dict[str, Any]) -> None:
+        self._write(self._replace_guild, guild_id, guild_data)
+
+    def _next_task_id(self, guild_id: int) -> int:
+        self._conn.execute(
+            "INSERT INTO task_counters (guild_id, counter) VALUES (?, 1) "
+            "ON CONFLICT(guild_id) DO UPDATE SET counter = counter + 1",
+            (guild_id,),
+        )
+        return self._conn.execute(
+            "SELECT counter FROM task_counters WHERE guild_id = ?", (guild_id,)
+        ).fetchone()["counter"]
+
+    def _update_row(self, guild_id: int, task_id: int, fields: Dict[str, Any]) -> Optional[Task]:
+        row = self._conn.execute(
+            "SELECT * FROM tasks WHERE guild_id = ? AND task_id = ?", (guild_id, task_id)
+        ).fetchone()
+        if not row:
+            return None
+        task = _row_to_task(row).update(**fields)
+        self._insert_task(guild_id, task)
+        return task
+
+    def allocate_task_id(self, guild_id: int) -> int:
+        # BEGIN IMMEDIATE takes the write lock, so this is atomic across processes too.
+        return self._write(self._next_task_id, guild_id)
+
+    def apply_ops(self, guild_id: int, ops: List[Tuple[Any, ...]]) -> None:
+        def apply():
+            for op in ops:
+                if op[0] == "create":
+                    self._insert_task(guild_id, op[1])
+                elif op[0] == "update":
+                    self._update_row(guild_id, op[1], op[2])
+                elif op[0] == "config":
+                    row = self._conn.execute(
+                        "SELECT data FROM server_config WHERE guild_id = ?", (guild_id,)
+                    ).fetchone()
+                    cfg = json.loads(row["data"]) if row else {}
+                    cfg.update(op[1])
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO server_config (guild_id, data) VALUES (?, ?)",
+                        (guild_id, json.dumps(cfg, ensure_ascii=False)),
+                    )
+
+        self._write(apply)
+
+    def create_task(self, guild_id: int, task: Task) -> Task:
+        def insert():
+            new_task = task.copy()
+            new_task.id = self._next_task_id(guild_id)
+            self._insert_task(guild_id, new_task)
+            return new_task
+
+        return self._write(insert)
+
+    def update_task(self, guild_id: int, task_id: int, fields: Dict[str, Any]) -> Optional[Task]:
+        return self._write(self._update_row, guild_id, task_id, fields)
+
+    def get_task(self, guild_id: int, task_id: int) -> Optional[Task]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM tasks WHERE guild_id = ? AND task_id = ?", (guild_id, task_id)
+            ).fetchone()
+        return _row_to_task(row) if row else None
+
+    def list_tasks(self, guild_id: int) -> Dict[str, Task]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM tasks WHERE guild_id = ? ORDER BY task_id", (guild_id,)
+            ).fetchall()
+        return {str(r["task_id"]): _row_to_task(r) for r in rows}
+
+    @staticmethod
+    def _where(
+        guild_id: int,
+        statuses: Optional[Iterable[TaskStatus]],
+        assignee_id: Optional[int],
+        priorities: Optional[Iterable[TaskPriority]],
+    ) -> Tuple[str, List[Any]]:
+        clauses = ["guild_id = ?"]
+        params: List[Any] = [guild_id]
+        if statuses is not None:
+            statuses = [status.value for status in statuses]
+            clauses.append(f"status IN ({', '.join('?' for _ in statuses)})")
+            params.extend(statuses)
+        if assignee_id is not None:
+            clauses.append("assignee_id = ?")
+            params.append(assignee_id)
+        if priorities is not None:
+            priorities = [priority.value for priority in priorities]
+            clauses.append(f"priority IN ({', '.join('?' for _ in priorities)})")
+            params.extend(priorities)
+        return " AND ".join(clauses), params
+
+    def query_tasks(
+        self,
+        guild_id: int,
+        statuses: Optional[Iterable[TaskStatus]] = None,
+        assignee_id: Optional[int] = None,
+        priorities: Optional[Iterable[TaskPriority]] = None,
+        limit: Optional[int] = None,
+        include_archived: bool = True,
+        after_id: Optional[int] = None,
+        before_id: Optional[int] = None,
+    ) -> List[Task]:
+        where, params = self._where(guild_id, statuses, assignee_id, priorities)
+        order = "ASC"
+        if before_id is not None:
+            where += " AND task_id < ?"
+            params.append(before_id)
+            order = "DESC"
+        elif after_id is not None:
+            where += " AND task_id > ?"
+            params.append(after_id)
+        sql = f"SELECT * FROM tasks WHERE {where} ORDER BY task_id {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        if order == "DESC":
+            rows.reverse()
+        return [_row_to_task(r) for r in rows]
+
+    def count_tasks(
+        self,
+        guild_id: int,
+        statuses: Optional[Iterable[TaskStatus]] = None,
+        assignee_id: Optional[int] = None,
+        priorities: Optional[Iterable[TaskPriority]] = None,
+    ) -> int:
+        where, params = self._where(guild_id, statuses, assignee_id, priorities)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM tasks WHERE {where}", params).fetchone()[0]
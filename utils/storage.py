@@ -1,70 +1,223 @@
-# utils/storage.py
-import json
+import atexit
 import os
-from typing import Any, Dict, Optional
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.models import Task, TaskPriority, TaskStatus
 
 DATA_DIR = "data"
-TASKS_FILE = os.path.join(DATA_DIR, "tasks.json")
+TASKS_DIR = os.path.join(DATA_DIR, "tasks")
+# Pre-sharding single file; migrated into TASKS_DIR on first start.
+LEGACY_TASKS_FILE = os.path.join(DATA_DIR, "tasks.json")
 CONFIG_FILE = os.path.join(DATA_DIR, "server_config.json")
+SQLITE_FILE = os.path.join(DATA_DIR, "storage.sqlite3")
+
+# "json" (default) keeps one JSON file per guild; "sqlite" uses SQLITE_FILE.
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "json").lower()
+
+# Seconds to wait after the first unsaved change before the background
+# flush (config writes, journal syncs, compaction) runs.
+FLUSH_DELAY = float(os.getenv("STORAGE_FLUSH_DELAY", "2.0"))
+
+# Seconds a guild's tasks stay in memory after their last use (JSON backend).
+IDLE_EVICT = float(os.getenv("STORAGE_IDLE_EVICT", "1800"))
+
+# JSON backend journal: when to fsync appended records ("always", "interval"
+# or "never") and the journal size that triggers folding it into a snapshot.
+FSYNC_POLICY = os.getenv("STORAGE_FSYNC", "interval").lower()
+COMPACT_BYTES = int(os.getenv("STORAGE_COMPACT_BYTES", str(256 * 1024)))
+
+# JSON backend snapshot files: "json" (indented, human-readable) or "binary"
+# (utils.snapshot; faster to load and save). `python -m utils.snapshot FILE`
+# prints a binary snapshot as JSON.
+SNAPSHOT_FORMAT = os.getenv("STORAGE_SNAPSHOT_FORMAT", "json").lower()
+
+# JSON backend: seconds after completion before a task moves to its guild's
+# archive file, which is only read when completed tasks are asked for.
+# 0 keeps every task loaded.
+ARCHIVE_AFTER = float(os.getenv("STORAGE_ARCHIVE_AFTER", str(7 * 24 * 3600)))
+
+TASK_STATUSES = tuple(TaskStatus)
+OPEN_STATUSES = (TaskStatus.OPEN, TaskStatus.IN_PROGRESS)
 
 os.makedirs(DATA_DIR, exist_ok=True)
 
+# Per-guild config version, bumped after every config write so cached
+# copies (see async_storage.get_config_snapshot) can tell they are stale.
+_config_versions: Dict[int, int] = {}
+_config_versions_lock = threading.Lock()
+
+# Per-task versions, drawn from a per-guild write sequence and bumped after
+# every task write, so rendered task embeds (utils.task_render) stay cached
+# until the task changes. Bulk writes raise the whole guild's floor. Only
+# the TASK_VERSIONS_SIZE most recently written tasks keep their own entry;
+# dropping one raises its guild's floor to that version, so no task's
+# version ever goes backwards.
+TASK_VERSIONS_SIZE = int(os.getenv("TASK_VERSIONS_SIZE", "4096"))
+_task_seqs: Dict[int, int] = {}
+_task_versions: "OrderedDict[Tuple[int, int], int]" = OrderedDict()
+_task_floors: Dict[int, int] = {}
+_task_versions_lock = threading.Lock()
+
+
+def _create_backend():
+    # Backends expose the same methods as the module-level functions below,
+    # with update_task taking its fields as a dict, plus flush().
+    if STORAGE_BACKEND == "json":
+        from utils.json_backend import JsonBackend
+        return JsonBackend(
+            TASKS_DIR, CONFIG_FILE, FLUSH_DELAY, IDLE_EVICT, COMPACT_BYTES, FSYNC_POLICY, LEGACY_TASKS_FILE,
+            snapshot_format=SNAPSHOT_FORMAT, archive_after=ARCHIVE_AFTER,
+        )
+
+    if STORAGE_BACKEND == "sqlite":
+        from utils.json_backend import JsonBackend
+        from utils.sqlite_backend import SqliteBackend
+
+        is_new = not os.path.exists(SQLITE_FILE)
+        backend = SqliteBackend(SQLITE_FILE)
+        if is_new and any(os.path.exists(p) for p in (LEGACY_TASKS_FILE, TASKS_DIR, CONFIG_FILE)):
+            # First start on SQLite: carry over the existing JSON data.
+            legacy = JsonBackend(
+                TASKS_DIR, CONFIG_FILE, FLUSH_DELAY, IDLE_EVICT, COMPACT_BYTES, FSYNC_POLICY, LEGACY_TASKS_FILE,
+                snapshot_format=SNAPSHOT_FORMAT,
+            )
+            for key, cfg in legacy.get_all_configs().items():
+                backend.set_server_config(int(key), cfg)
+            backend.set_all_tasks(legacy.get_all_tasks())
+        return backend
+
+    raise RuntimeError(f"Unknown STORAGE_BACKEND {STORAGE_BACKEND!r} (expected 'json' or 'sqlite')")
 
-def _load_json(path: str) -> Dict[str, Any]:
-    if not os.path.exists(path):
-        return {}
-    with open(path, "r", encoding="utf-8") as f:
-        try:
-            return json.load(f)
-        except json.JSONDecodeError:
-            return {}
 
+_backend = _create_backend()
 
-def _save_json(path: str, data: Dict[str, Any]) -> None:
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+
+def flush() -> None:
+    """Write any buffered changes to disk now. Safe to call from any thread."""
+    _backend.flush()
+
+
+atexit.register(flush)
+
+
+def normalize_status(status: str) -> Optional[TaskStatus]:
+    """Map user input such as "in progress" to a TaskStatus."""
+    return TaskStatus.parse(status)
+
+
+def _parse_statuses(statuses: Optional[Iterable[Any]]) -> Optional[List[TaskStatus]]:
+    if statuses is None:
+        return None
+    return [s for s in map(TaskStatus.parse, statuses) if s is not None]
+
+
+def _parse_priorities(priorities: Optional[Iterable[Any]]) -> Optional[List[TaskPriority]]:
+    if priorities is None:
+        return None
+    return [p for p in map(TaskPriority.parse, priorities) if p is not None]
 
 
 # ---- Server config (per guild) ----
 
+def config_version(guild_id: int) -> int:
+    return _config_versions.get(guild_id, 0)
+
+
+def _bump_config_version(guild_id: int) -> None:
+    with _config_versions_lock:
+        _config_versions[guild_id] = _config_versions.get(guild_id, 0) + 1
+
+
 def get_server_config(guild_id: int) -> Dict[str, Any]:
-    data = _load_json(CONFIG_FILE)
-    return data.get(str(guild_id), {})
+    return _backend.get_server_config(guild_id)
 
 
 def set_server_config(guild_id: int, new_config: Dict[str, Any]) -> None:
-    data = _load_json(CONFIG_FILE)
-    data[str(guild_id)] = new_config
-    _save_json(CONFIG_FILE, data)
+    _backend.set_server_config(guild_id, new_config)
+    _bump_config_version(guild_id)
 
 
 def update_server_config(guild_id: int, **kwargs) -> Dict[str, Any]:
-    cfg = get_server_config(guild_id)
-    cfg.update(kwargs)
-    set_server_config(guild_id, cfg)
-    return cfg
+    """Set only the given keys; the backend merges them atomically."""
+    apply_ops(guild_id, [("config", kwargs)])
+    return get_server_config(guild_id)
 
 
 # ---- Task storage ----
-# tasks stored per guild, with incremental integer IDs
+# tasks stored per guild, with incremental integer IDs. get_all_tasks,
+# get_guild_tasks and their setters use the plain JSON layout; everything
+# else deals in Task objects.
+
+def task_write_seq(guild_id: int) -> int:
+    return _task_seqs.get(guild_id, 0)
+
+
+def task_version(guild_id: int, task_id: int) -> int:
+    """
+    Changes after every write to the task. A version no greater than a
+    task_write_seq() read before loading the task is safe to cache under.
+    """
+    return max(_task_versions.get((guild_id, task_id), 0), _task_floors.get(guild_id, 0))
+
+
+def _bump_task_versions(guild_id: int, task_ids: Optional[Iterable[int]] = None) -> None:
+    """Bump the given tasks, or every task in the guild if task_ids is None."""
+    with _task_versions_lock:
+        seq = _task_seqs[guild_id] = _task_seqs.get(guild_id, 0) + 1
+        if task_ids is None:
+            _task_floors[guild_id] = seq
+        else:
+            for task_id in task_ids:
+                _task_versions[(guild_id, task_id)] = seq
+                _task_versions.move_to_end((guild_id, task_id))
+            while len(_task_versions) > TASK_VERSIONS_SIZE:
+                (old_guild, _), version = _task_versions.popitem(last=False)
+                _task_floors[old_guild] = max(_task_floors.get(old_guild, 0), version)
+
 
 def get_all_tasks() -> Dict[str, Any]:
-    return _load_json(TASKS_FILE)
+    return _backend.get_all_tasks()
 
 
 def set_all_tasks(data: Dict[str, Any]) -> None:
-    _save_json(TASKS_FILE, data)
+    _backend.set_all_tasks(data)
+    for guild_id in data:
+        _bump_task_versions(int(guild_id))
 
 
 def get_guild_tasks(guild_id: int) -> Dict[str, Any]:
-    data = get_all_tasks()
-    return data.get(str(guild_id), {"counter": 0, "tasks": {}})
+    return _backend.get_guild_tasks(guild_id)
 
 
 def save_guild_tasks(guild_id: int, guild_data: Dict[str, Any]) -> None:
-    data = get_all_tasks()
-    data[str(guild_id)] = guild_data
-    set_all_tasks(data)
+    _backend.save_guild_tasks(guild_id, guild_data)
+    _bump_task_versions(guild_id)
+
+
+def build_task(
+    task_id: int,
+    creator_id: int,
+    title: str,
+    description: str,
+    priority: Any,
+    message_id: Optional[int] = None,
+    channel_id: Optional[int] = None,
+    thread_id: Optional[int] = None,
+) -> Task:
+    """A new Open task; unknown priorities become Medium."""
+    return Task(
+        id=task_id,
+        title=title,
+        description=description,
+        priority=TaskPriority.parse(priority, TaskPriority.MEDIUM),
+        status=TaskStatus.OPEN,
+        creator_id=creator_id,
+        message_id=message_id,
+        channel_id=channel_id,
+        thread_id=thread_id,
+    )
 
 
 def create_task(
@@ -72,53 +225,84 @@ def create_task(
     creator_id: int,
     title: str,
     description: str,
-    priority: str,
+    priority: Any,
     message_id: Optional[int] = None,
     channel_id: Optional[int] = None,
     thread_id: Optional[int] = None,
-) -> Dict[str, Any]:
-    guild_data = get_guild_tasks(guild_id)
-    counter = guild_data.get("counter", 0) + 1
-    guild_data["counter"] = counter
-
-    task_id = counter
-    task = {
-        "id": task_id,
-        "title": title,
-        "description": description,
-        "priority": priority,
-        "status": "Open",
-        "creator_id": creator_id,
-        "assignee_id": None,
-        "message_id": message_id,
-        "channel_id": channel_id,
-        "thread_id": thread_id,
-    }
-
-    guild_data.setdefault("tasks", {})
-    guild_data["tasks"][str(task_id)] = task
-    save_guild_tasks(guild_id, guild_data)
+) -> Task:
+    # The backend assigns the real ID.
+    task = build_task(0, creator_id, title, description, priority, message_id, channel_id, thread_id)
+    task = _backend.create_task(guild_id, task)
+    _bump_task_versions(guild_id, (task.id,))
     return task
 
 
-def update_task(guild_id: int, task_id: int, **kwargs) -> Optional[Dict[str, Any]]:
-    guild_data = get_guild_tasks(guild_id)
-    tasks = guild_data.get("tasks", {})
-    t = tasks.get(str(task_id))
-    if not t:
-        return None
-    t.update(kwargs)
-    tasks[str(task_id)] = t
-    guild_data["tasks"] = tasks
-    save_guild_tasks(guild_id, guild_data)
-    return t
+def update_task(guild_id: int, task_id: int, **kwargs) -> Optional[Task]:
+    task = _backend.update_task(guild_id, task_id, kwargs)
+    if task is not None:
+        _bump_task_versions(guild_id, (task_id,))
+    return task
+
+
+def allocate_task_id(guild_id: int) -> int:
+    """Reserve the next task ID for a guild; IDs are never handed out twice."""
+    return _backend.allocate_task_id(guild_id)
 
 
-def get_task(guild_id: int, task_id: int) -> Optional[Dict[str, Any]]:
-    guild_data = get_guild_tasks(guild_id)
-    return guild_data.get("tasks", {}).get(str(task_id))
+def apply_ops(guild_id: int, ops: List[Tuple[Any, ...]]) -> None:
+    """
+    Commit several changes for one guild as a single write. Each op is
+    ("create", task), ("update", task_id, fields) or ("config", fields).
+    """
+    _backend.apply_ops(guild_id, ops)
+    task_ids = [op[1].id if op[0] == "create" else op[1] for op in ops if op[0] in ("create", "update")]
+    if task_ids:
+        _bump_task_versions(guild_id, task_ids)
+    if any(op[0] == "config" for op in ops):
+        _bump_config_version(guild_id)
 
 
-def list_tasks(guild_id: int) -> Dict[str, Any]:
-    guild_data = get_guild_tasks(guild_id)
-    return guild_data.get("tasks", {})
+def get_task(guild_id: int, task_id: int) -> Optional[Task]:
+    return _backend.get_task(guild_id, task_id)
+
+
+def list_tasks(guild_id: int) -> Dict[str, Task]:
+    return _backend.list_tasks(guild_id)
+
+
+def query_tasks(
+    guild_id: int,
+    statuses: Optional[Iterable[Any]] = None,
+    assignee_id: Optional[int] = None,
+    priorities: Optional[Iterable[Any]] = None,
+    limit: Optional[int] = None,
+    include_archived: bool = True,
+    after_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+) -> List[Task]:
+    """
+    Tasks matching every given filter, ordered by ID. include_archived=False
+    skips archived completed tasks, so the archive is never loaded.
+
+    For paging, after_id returns the first `limit` matches with a larger ID
+    and before_id the last `limit` matches with a smaller one.
+    """
+    return _backend.query_tasks(
+        guild_id,
+        _parse_statuses(statuses),
+        assignee_id,
+        _parse_priorities(priorities),
+        limit,
+        include_archived,
+        after_id,
+        before_id,
+    )
+
+
+def count_tasks(
+    guild_id: int,
+    statuses: Optional[Iterable[Any]] = None,
+    assignee_id: Optional[int] = None,
+    priorities: Optional[Iterable[Any]] = None,
+) -> int:
+    return _backend.count_tasks(guild_id, _parse_statuses(statuses), assignee_id, _parse_priorities(priorities))
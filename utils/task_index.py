@@ -0,0 +1,153 @@
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from utils.models import Task
+
+
+def _contains_sorted(ids: List[int], task_id: int) -> bool:
+    i = bisect_left(ids, task_id)
+    return i < len(ids) and ids[i] == task_id
+
+
+def _discard_sorted(ids: List[int], task_id: int) -> None:
+    i = bisect_left(ids, task_id)
+    if i < len(ids) and ids[i] == task_id:
+        del ids[i]
+
+
+def _walk(ids: List[int], after_id: Optional[int], before_id: Optional[int]) -> Iterator[int]:
+    """
+    IDs past the cursor without copying the list: ascending from after_id,
+    or descending from before_id when that is set.
+    """
+    if before_id is not None:
+        start = bisect_left(ids, before_id)
+        return (ids[j] for j in range(start - 1, -1, -1))
+    start = 0 if after_id is None else bisect_right(ids, after_id)
+    return (ids[j] for j in range(start, len(ids)))
+
+
+class TaskIndex:
+    """
+    Secondary indexes over one guild's tasks, kept up to date on every
+    change so filtered listings never scan or re-sort the whole guild:
+    status -> sorted IDs, assignee_id -> IDs, priority -> IDs.
+    """
+
+    def __init__(self, tasks: Iterable[Task] = ()):
+        self.all_ids: List[int] = []
+        self.by_status: Dict[Any, List[int]] = {}
+        self.by_assignee: Dict[Any, Set[int]] = {}
+        self.by_priority: Dict[Any, Set[int]] = {}
+        for task in tasks:
+            self._add_unsorted(task)
+        self.all_ids.sort()
+        for ids in self.by_status.values():
+            ids.sort()
+
+    def _add_unsorted(self, task: Task) -> None:
+        task_id = task.id
+        self.all_ids.append(task_id)
+        self.by_status.setdefault(task.status, []).append(task_id)
+        self.by_assignee.setdefault(task.assignee_id, set()).add(task_id)
+        self.by_priority.setdefault(task.priority, set()).add(task_id)
+
+    def add(self, task: Task) -> None:
+        task_id = task.id
+        insort(self.all_ids, task_id)
+        insort(self.by_status.setdefault(task.status, []), task_id)
+        self.by_assignee.setdefault(task.assignee_id, set()).add(task_id)
+        self.by_priority.setdefault(task.priority, set()).add(task_id)
+
+    def remove(self, task: Task) -> None:
+        task_id = task.id
+        _discard_sorted(self.all_ids, task_id)
+        _discard_sorted(self.by_status.get(task.status, []), task_id)
+        self.by_assignee.get(task.assignee_id, set()).discard(task_id)
+        self.by_priority.get(task.priority, set()).discard(task_id)
+
+    def _filters(self, assignee_id: Optional[int], priorities: Optional[Iterable[Any]]) -> List[Set[int]]:
+        filters = []
+        if assignee_id is not None:
+            filters.append(self.by_assignee.get(assignee_id, set()))
+        if priorities is not None:
+            filters.append(set().union(*(self.by_priority.get(p, set()) for p in priorities)))
+        return filters
+
+    def _plan(
+        self,
+        statuses: Optional[Iterable[Any]],
+        assignee_id: Optional[int],
+        priorities: Optional[Iterable[Any]],
+    ) -> Tuple[Optional[List[int]], Optional[List[List[int]]], List[Set[int]]]:
+        """
+        Returns (small, status_lists, filters). When `small` is set it holds
+        the full answer as an unsorted list, built by probing the smallest
+        filter set; otherwise walk `status_lists` (or all IDs) in order and
+        keep IDs present in every filter set.
+        """
+        filters = self._filters(assignee_id, priorities)
+        status_lists = None
+        if statuses is not None:
+            status_lists = [self.by_status.get(status, []) for status in statuses]
+        if not filters:
+            return None, status_lists, filters
+        smallest = min(filters, key=len)
+        scanned = len(self.all_ids) if status_lists is None else sum(len(ids) for ids in status_lists)
+        if len(smallest) > scanned:
+            return None, status_lists, filters
+        small = [
+            i for i in smallest
+            if all(i in f for f in filters)
+            and (status_lists is None or any(_contains_sorted(ids, i) for ids in status_lists))
+        ]
+        return small, status_lists, filters
+
+    def query(
+        self,
+        statuses: Optional[Iterable[Any]] = None,
+        assignee_id: Optional[int] = None,
+        priorities: Optional[Iterable[Any]] = None,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+        before_id: Optional[int] = None,
+    ) -> List[int]:
+        """
+        Matching task IDs in ascending order. With after_id, only the first
+        `limit` IDs above it; with before_id, the last `limit` IDs below it.
+        Either way the work is proportional to the page, not the guild.
+        """
+        descending = before_id is not None
+        small, status_lists, filters = self._plan(statuses, assignee_id, priorities)
+        if small is not None:
+            ids: Iterator[int] = iter(sorted(
+                i for i in small
+                if (after_id is None or i > after_id) and (before_id is None or i < before_id)
+            ))
+            if descending:
+                ids = reversed(list(ids))
+        else:
+            sources = [self.all_ids] if status_lists is None else status_lists
+            ids = heapq.merge(*(_walk(s, after_id, before_id) for s in sources), reverse=descending)
+            if filters:
+                ids = (i for i in ids if all(i in f for f in filters))
+        page = list(islice(ids, limit))
+        if descending:
+            page.reverse()
+        return page
+
+    def count(
+        self,
+        statuses: Optional[Iterable[Any]] = None,
+        assignee_id: Optional[int] = None,
+        priorities: Optional[Iterable[Any]] = None,
+    ) -> int:
+        small, status_lists, filters = self._plan(statuses, assignee_id, priorities)
+        if small is not None:
+            return len(small)
+        if not filters:
+            return len(self.all_ids) if status_lists is None else sum(len(ids) for ids in status_lists)
+        ids = self.all_ids if status_lists is None else heapq.merge(*status_lists)
+        return sum(1 for i in ids if all(i in f for f in filters))
@@ -0,0 +1,116 @@
+"""
+Builds the task embed shown on each task's message and the per-task field
+used by /tasks and the task board.
+
+Results are cached per task and reused until storage.task_version changes.
+Callers pass `seq`, the guild's storage.task_write_seq() read *before* the
+task was loaded; a task whose version is newer than that may have been read
+mid-write, so it is rendered but not cached. Without `seq` nothing is cached.
+
+content_digest() fingerprints the fields of a message send or edit, for
+skipping edits that change nothing visible (see message_cache.SentContent).
+"""
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+import discord
+
+from utils import metrics
+from utils import storage
+from utils.models import Task
+
+RENDER_CACHE_SIZE = int(os.getenv("RENDER_CACHE_SIZE", "4096"))
+
+
+class _RenderCache:
+    def __init__(self, name: str, maxsize: int = RENDER_CACHE_SIZE):
+        self.name = name
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Tuple[int, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, version: int) -> Any:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != version:
+            metrics.incr(f"{self.name}_cache_misses")
+            return None
+        self._entries.move_to_end(key)
+        metrics.incr(f"{self.name}_cache_hits")
+        return entry[1]
+
+    def put(self, key: Hashable, version: int, value: Any) -> None:
+        self._entries[key] = (version, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+_embeds = _RenderCache("task_embed")
+_fields = _RenderCache("task_field")
+
+
+def _cacheable_version(guild_id: int, task: Task, seq: Optional[int]) -> Optional[int]:
+    if seq is None:
+        return None
+    version = storage.task_version(guild_id, task.id)
+    return version if version <= seq else None
+
+
+def assignee_text(task: Task) -> str:
+    return f"<@{task.assignee_id}>" if task.assignee_id else "Unassigned"
+
+
+def task_embed(guild_id: int, task: Task, seq: Optional[int] = None) -> discord.Embed:
+    """The embed on the task's own message. Shared when cached; don't mutate it."""
+    version = _cacheable_version(guild_id, task, seq)
+    if version is not None:
+        embed = _embeds.get((guild_id, task.id), version)
+        if embed is not None:
+            return embed
+
+    embed = discord.Embed(
+        title=f"[Task #{task.id}] {task.title}",
+        description=task.description,
+        color=discord.Color.orange()
+    )
+    embed.add_field(name="Priority", value=task.priority, inline=True)
+    embed.add_field(name="Status", value=task.status, inline=True)
+    embed.add_field(name="Assignee", value=assignee_text(task), inline=True)
+    embed.set_footer(text=f"Creator ID: {task.creator_id}")
+
+    if version is not None:
+        _embeds.put((guild_id, task.id), version, embed)
+    return embed
+
+
+def task_field(guild_id: int, task: Task, seq: Optional[int] = None) -> Tuple[str, str]:
+    """(name, value) of the task's field in /tasks and on the task board."""
+    version = _cacheable_version(guild_id, task, seq)
+    if version is not None:
+        field = _fields.get((guild_id, task.id), version)
+        if field is not None:
+            return field
+
+    field = (
+        f"Task #{task.id}",
+        f"**Title:** {task.title}\n"
+        f"**Status:** {task.status} | **Priority:** {task.priority}\n"
+        f"**Assignee:** {assignee_text(task)}"
+    )
+
+    if version is not None:
+        _fields.put((guild_id, task.id), version, field)
+    return field
+
+
+def content_digest(**fields: Any) -> int:
+    """Fingerprint of send/edit keyword arguments (content, embed, view)."""
+    parts = {}
+    for key, value in fields.items():
+        if isinstance(value, discord.Embed):
+            value = value.to_dict()
+        elif isinstance(value, discord.ui.View):
+            value = value.to_components()
+        parts[key] = value
+    return hash(json.dumps(parts, sort_keys=True, default=str))